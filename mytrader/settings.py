@@ -67,6 +67,9 @@ MIDDLEWARE = [
 
 ROOT_URLCONF = 'mytrader.urls'
 
+# 未显式配置 loaders 时，Django (>=4.1) 会自动用 cached.Loader 包装默认加载器，
+# 模板只编译一次（包括 admin change_list 及其子模板），因此这里无需手动配置。
+# admin 列表行不做 {% cache %} 片段缓存：行内链接携带 _changelist_filters 等请求相关参数。
 TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
@@ -240,6 +243,19 @@ CELERY_TASK_SERIALIZER = 'json'
 CELERY_RESULT_SERIALIZER = 'json'
 CELERY_TIMEZONE = 'Asia/Shanghai'
 CELERY_BEAT_SCHEDULER = 'django_celery_beat.schedulers:DatabaseScheduler'
+CELERY_TASK_ROUTES = {
+    # 通知发送使用独立队列，worker 需监听: -Q celery,notifications
+    'trading.tasks.send_*': {'queue': 'notifications'},
+}
+
+# 缓存配置
+# 报表缓存的失效版本号需在 web、Celery worker 与管理命令之间共享，使用 Redis 而非进程内缓存
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': os.environ.get('CACHE_URL', 'redis://localhost:6379/1'),
+    }
+}
 
 # 日志配置
 LOGGING = {
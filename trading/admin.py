@@ -1,6 +1,12 @@
+from functools import lru_cache
+
 from django.contrib import admin
-from django.utils.html import format_html
-from django.db.models import Sum, F, DecimalField
+from django.utils.html import format_html, escape
+from django.utils.safestring import mark_safe
+from django.db.models import (
+    Sum, Count, F, Q, DecimalField, FloatField, Case, When, Value, BooleanField, ExpressionWrapper
+)
+from django.db.models.functions import NullIf
 from .models import (
     Account, AccountTransaction, Symbol, Strategy, TradeLog, TradeImage, Position,
     DailyReport, MonthlyReport, PerformanceMetrics, TradeReview,
@@ -10,6 +16,79 @@ from .models import (
 )
 
 
+def _colored(color, text):
+    """彩色文字 <span style="color: ...;">...</span>，用于各列表页的着色显示列"""
+    return mark_safe('<span style="color: ' + escape(color) + ';">' + escape(text) + '</span>')
+
+
+@lru_cache(maxsize=256)
+def _tag_badge(color, name):
+    """标签色块（标签颜色/名称组合有限，缓存渲染结果）"""
+    return format_html(
+        '<span style="background:{};color:white;padding:3px 10px;border-radius:3px;">{}</span>',
+        color, name
+    )
+
+
+class ChangelistDeferMixin:
+    """列表页延迟加载大字段
+
+    列表页不展示的长文本/JSON 字段通过 defer 排除，减少查询传输的数据量；
+    编辑页仍加载完整字段，避免表单逐字段回查。
+    """
+    changelist_defer_fields = ()
+
+    def get_queryset(self, request):
+        qs = super().get_queryset(request)
+        if self.changelist_defer_fields and self._is_changelist_request(request):
+            qs = qs.defer(*self.changelist_defer_fields)
+        return qs
+
+    def _is_changelist_request(self, request):
+        match = getattr(request, 'resolver_match', None)
+        return bool(match and match.url_name and match.url_name.endswith('_changelist'))
+
+
+class SymbolSearchMixin:
+    """按标的代码/名称搜索
+
+    先在标的表内匹配代码或名称，再以 symbol_id 过滤本表，
+    避免每个搜索词都对 JOIN 后的大表逐行做 LIKE 匹配。
+    与 Django 默认搜索一致：每个搜索词可命中标的或任一 search_fields，多个词之间取交集。
+    """
+    _SEARCH_PREFIX_LOOKUPS = {'^': 'istartswith', '=': 'iexact', '@': 'search'}
+
+    def get_search_results(self, request, queryset, search_term):
+        from django.contrib.admin.utils import lookup_spawns_duplicates
+        from django.utils.text import smart_split, unescape_string_literal
+
+        if not search_term:
+            return queryset, False
+
+        orm_lookups = []
+        for field_name in self.get_search_fields(request):
+            lookup = self._SEARCH_PREFIX_LOOKUPS.get(field_name[:1])
+            if lookup:
+                orm_lookups.append(f'{field_name[1:]}__{lookup}')
+            else:
+                orm_lookups.append(f'{field_name}__icontains')
+
+        condition = Q()
+        for bit in smart_split(search_term):
+            if bit.startswith(('"', "'")) and bit[0] == bit[-1]:
+                bit = unescape_string_literal(bit)
+            symbol_ids = Symbol.objects.filter(
+                Q(code__icontains=bit) | Q(name__icontains=bit)
+            ).values('pk')
+            bit_condition = Q(symbol_id__in=symbol_ids)
+            for orm_lookup in orm_lookups:
+                bit_condition |= Q(**{orm_lookup: bit})
+            condition &= bit_condition
+
+        may_have_duplicates = any(lookup_spawns_duplicates(self.opts, lookup) for lookup in orm_lookups)
+        return queryset.filter(condition), may_have_duplicates
+
+
 @admin.register(Account)
 class AccountAdmin(admin.ModelAdmin):
     """交易账户管理界面"""
@@ -37,13 +116,13 @@ class AccountAdmin(admin.ModelAdmin):
     def total_profit_loss(self, obj):
         profit_loss = obj.total_profit_loss
         color = 'green' if profit_loss >= 0 else 'red'
-        return format_html('<span style="color: {};">{}</span>', color, f'{profit_loss:.2f}')
+        return _colored(color, f'{profit_loss:.2f}')
     total_profit_loss.short_description = '总盈亏'
 
     def profit_loss_ratio(self, obj):
         ratio = obj.profit_loss_ratio
         color = 'green' if ratio >= 0 else 'red'
-        return format_html('<span style="color: {};">{}%</span>', color, f'{ratio:.2f}')
+        return _colored(color, f'{ratio:.2f}%')
     profit_loss_ratio.short_description = '盈亏比例'
 
 
@@ -52,6 +131,8 @@ class AccountTransactionAdmin(admin.ModelAdmin):
     """账户流水管理界面"""
     list_display = ['transaction_time', 'account', 'transaction_type', 'amount_display',
                     'balance_before', 'balance_after', 'trade_log', 'description']
+    # 交易日志的 __str__ 用到标的代码，一并 JOIN 取回，避免每行再查标的
+    list_select_related = ['account', 'trade_log__symbol']
     list_filter = ['transaction_type', 'account', 'transaction_time']
     search_fields = ['account__name', 'description', 'trade_log__order_id']
     readonly_fields = ['balance_before', 'balance_after', 'created_at']
@@ -70,7 +151,7 @@ class AccountTransactionAdmin(admin.ModelAdmin):
 
     def amount_display(self, obj):
         color = 'green' if obj.amount >= 0 else 'red'
-        return format_html('<span style="color: {};">{}</span>', color, f'{obj.amount:.2f}')
+        return _colored(color, f'{obj.amount:.2f}')
     amount_display.short_description = '金额'
 
     def has_add_permission(self, request):
@@ -167,16 +248,20 @@ class TradeReviewInline(admin.StackedInline):
 
 
 @admin.register(TradeLog)
-class TradeLogAdmin(admin.ModelAdmin):
+class TradeLogAdmin(SymbolSearchMixin, admin.ModelAdmin):
     """交易日志管理界面"""
     inlines = [TradeImageInline, TradeReviewInline]
     list_display = ['trade_time', 'account', 'symbol', 'side', 'quantity',
                     'executed_price', 'total_amount', 'profit_loss', 'holding_display', 'tags_display', 'status']
     list_filter = ['status', 'side', 'account', 'strategy', 'symbol', 'tags', 'trade_time']
-    search_fields = ['symbol__code', 'symbol__name', 'order_id', 'account__name', 'strategy__name']
+    search_fields = ['order_id', 'account__name', 'strategy__name']
     date_hierarchy = 'trade_time'
     filter_horizontal = ['tags']
 
+    def get_queryset(self, request):
+        # 标签列逐行读取多对多关系，预取后整页只需一次查询
+        return super().get_queryset(request).prefetch_related('tags')
+
     def get_readonly_fields(self, request, obj=None):
         if obj:  # 编辑已存在的对象
             return ['trade_time', 'created_at', 'total_amount', 'holding_minutes']
@@ -265,12 +350,12 @@ class TradeLogAdmin(admin.ModelAdmin):
 
 
 @admin.register(Position)
-class PositionAdmin(admin.ModelAdmin):
+class PositionAdmin(SymbolSearchMixin, admin.ModelAdmin):
     """持仓管理界面"""
     list_display = ['account', 'symbol', 'quantity', 'avg_price',
                     'current_price', 'market_value', 'profit_loss', 'profit_loss_ratio']
     list_filter = ['account', 'symbol', 'updated_at']
-    search_fields = ['symbol__code', 'symbol__name', 'account__name']
+    search_fields = ['account__name']
     readonly_fields = ['updated_at']
     fieldsets = (
         ('基本信息', {
@@ -289,12 +374,12 @@ class PositionAdmin(admin.ModelAdmin):
 
     def profit_loss(self, obj):
         color = 'green' if obj.profit_loss >= 0 else 'red'
-        return format_html('<span style="color: {};">{}</span>', color, f'{obj.profit_loss:.2f}')
+        return _colored(color, f'{obj.profit_loss:.2f}')
     profit_loss.short_description = '盈亏'
 
     def profit_loss_ratio(self, obj):
         color = 'green' if obj.profit_loss_ratio >= 0 else 'red'
-        return format_html('<span style="color: {};">{}%</span>', color, f'{obj.profit_loss_ratio:.2f}')
+        return _colored(color, f'{obj.profit_loss_ratio:.2f}%')
     profit_loss_ratio.short_description = '盈亏比例'
 
 
@@ -330,12 +415,12 @@ class DailyReportAdmin(admin.ModelAdmin):
 
     def profit_loss(self, obj):
         color = 'green' if obj.profit_loss >= 0 else 'red'
-        return format_html('<span style="color: {};">{}</span>', color, f'{obj.profit_loss:.2f}')
+        return _colored(color, f'{obj.profit_loss:.2f}')
     profit_loss.short_description = '当日盈亏'
 
     def profit_loss_ratio(self, obj):
         color = 'green' if obj.profit_loss_ratio >= 0 else 'red'
-        return format_html('<span style="color: {};">{}%</span>', color, f'{obj.profit_loss_ratio:.2f}')
+        return _colored(color, f'{obj.profit_loss_ratio:.2f}%')
     profit_loss_ratio.short_description = '盈亏比例'
 
 
@@ -370,12 +455,12 @@ class MonthlyReportAdmin(admin.ModelAdmin):
 
     def profit_loss(self, obj):
         color = 'green' if obj.profit_loss >= 0 else 'red'
-        return format_html('<span style="color: {};">{}</span>', color, f'{obj.profit_loss:.2f}')
+        return _colored(color, f'{obj.profit_loss:.2f}')
     profit_loss.short_description = '月度盈亏'
 
     def profit_loss_ratio(self, obj):
         color = 'green' if obj.profit_loss_ratio >= 0 else 'red'
-        return format_html('<span style="color: {};">{}%</span>', color, f'{obj.profit_loss_ratio:.2f}')
+        return _colored(color, f'{obj.profit_loss_ratio:.2f}%')
     profit_loss_ratio.short_description = '盈亏比例'
 
 
@@ -413,17 +498,17 @@ class PerformanceMetricsAdmin(admin.ModelAdmin):
 
     def win_rate(self, obj):
         color = 'green' if obj.win_rate >= 50 else 'red'
-        return format_html('<span style="color: {};">{}%</span>', color, f'{obj.win_rate:.2f}')
+        return _colored(color, f'{obj.win_rate:.2f}%')
     win_rate.short_description = '胜率'
 
     def total_return(self, obj):
         color = 'green' if obj.total_return >= 0 else 'red'
-        return format_html('<span style="color: {};">{}%</span>', color, f'{obj.total_return:.2f}')
+        return _colored(color, f'{obj.total_return:.2f}%')
     total_return.short_description = '总收益率'
 
     def max_drawdown_ratio(self, obj):
         color = 'red' if obj.max_drawdown_ratio < 0 else 'gray'
-        return format_html('<span style="color: {};">{}%</span>', color, f'{obj.max_drawdown_ratio:.2f}')
+        return _colored(color, f'{obj.max_drawdown_ratio:.2f}%')
     max_drawdown_ratio.short_description = '最大回撤比例'
 
 
@@ -432,6 +517,8 @@ class TradeReviewAdmin(admin.ModelAdmin):
     """交易复盘管理界面"""
     list_display = ['trade_info', 'trade_time', 'profit_loss_display', 'emotion_before',
                     'emotion_after', 'execution_score_display', 'followed_plan_display', 'tags_display']
+    # 交易信息列用到交易日志及其标的，一并 JOIN 取回
+    list_select_related = ['trade_log__symbol']
     list_filter = ['emotion_before', 'emotion_after', 'execution_score', 'followed_plan', 'created_at']
     search_fields = ['trade_log__symbol__code', 'trade_log__symbol__name', 'entry_reason',
                     'exit_reason', 'lessons_learned', 'tags']
@@ -480,7 +567,7 @@ class TradeReviewAdmin(admin.ModelAdmin):
         """盈亏显示"""
         pl = obj.trade_log.profit_loss
         color = 'green' if pl >= 0 else 'red'
-        return format_html('<span style="color: {};">{}</span>', color, f'{pl:.2f}')
+        return _colored(color, f'{pl:.2f}')
     profit_loss_display.short_description = '盈亏'
 
     def execution_score_display(self, obj):
@@ -488,7 +575,7 @@ class TradeReviewAdmin(admin.ModelAdmin):
         if not obj.execution_score:
             return '-'
         color = obj.get_score_color()
-        return format_html('<span style="color: {};">{}分</span>', color, obj.execution_score)
+        return _colored(color, f'{obj.execution_score}分')
     execution_score_display.short_description = '评分'
 
     def followed_plan_display(self, obj):
@@ -627,8 +714,7 @@ class RiskAlertAdmin(admin.ModelAdmin):
 
     def status_display(self, obj):
         """状态显示"""
-        return format_html('<span style="color: {};">{}</span>',
-                          obj.get_status_color(), obj.get_status_display())
+        return _colored(obj.get_status_color(), obj.get_status_display())
     status_display.short_description = '状态'
 
     def value_display(self, obj):
@@ -713,7 +799,7 @@ class RiskSnapshotAdmin(admin.ModelAdmin):
             color = 'orange'
         else:
             color = 'gray'
-        return format_html('<span style="color: {};">{}%</span>', color, f'{obj.current_drawdown_percent:.2f}')
+        return _colored(color, f'{obj.current_drawdown_percent:.2f}%')
     drawdown_display.short_description = '当前回撤'
 
     def position_ratio_display(self, obj):
@@ -724,7 +810,7 @@ class RiskSnapshotAdmin(admin.ModelAdmin):
             color = 'orange'
         else:
             color = 'green'
-        return format_html('<span style="color: {};">{}%</span>', color, f'{obj.position_ratio:.2f}')
+        return _colored(color, f'{obj.position_ratio:.2f}%')
     position_ratio_display.short_description = '仓位'
 
     def risk_score_display(self, obj):
@@ -794,11 +880,11 @@ class WatchlistGroupAdmin(admin.ModelAdmin):
 
 
 @admin.register(WatchlistItem)
-class WatchlistItemAdmin(admin.ModelAdmin):
+class WatchlistItemAdmin(SymbolSearchMixin, admin.ModelAdmin):
     """观察项目管理界面"""
     list_display = ['symbol', 'group', 'priority_display', 'target_price', 'price_alerts', 'is_active', 'updated_at']
     list_filter = ['group', 'priority', 'is_active', 'group__owner']
-    search_fields = ['symbol__code', 'symbol__name', 'notes', 'tags']
+    search_fields = ['notes', 'tags']
     raw_id_fields = ['symbol']
     list_editable = ['is_active']
 
@@ -816,8 +902,7 @@ class WatchlistItemAdmin(admin.ModelAdmin):
 
     def priority_display(self, obj):
         colors = {1: 'gray', 2: 'blue', 3: 'orange', 4: 'red'}
-        return format_html('<span style="color: {};">{}</span>',
-                          colors.get(obj.priority, 'gray'), obj.get_priority_display())
+        return _colored(colors.get(obj.priority, 'gray'), obj.get_priority_display())
     priority_display.short_description = '优先级'
 
     def price_alerts(self, obj):
@@ -831,13 +916,13 @@ class WatchlistItemAdmin(admin.ModelAdmin):
 
 
 @admin.register(TradePlan)
-class TradePlanAdmin(admin.ModelAdmin):
+class TradePlanAdmin(SymbolSearchMixin, ChangelistDeferMixin, admin.ModelAdmin):
     """交易计划管理界面"""
+    changelist_defer_fields = ('analysis', 'key_levels', 'execution_notes')
     list_display = ['plan_date', 'symbol', 'direction_display', 'entry_range', 'stop_loss',
                     'rr_ratio_display', 'status_display', 'is_valid_display']
     list_filter = ['status', 'plan_type', 'direction', 'account', 'plan_date']
-    search_fields = ['symbol__code', 'symbol__name', 'analysis', 'entry_condition']
-    date_hierarchy = 'plan_date'
+    search_fields = ['analysis', 'entry_condition']
     raw_id_fields = ['symbol', 'executed_trade']
     actions = ['mark_pending', 'mark_cancelled', 'mark_expired']
 
@@ -872,8 +957,7 @@ class TradePlanAdmin(admin.ModelAdmin):
 
     def direction_display(self, obj):
         colors = {'long': 'red', 'short': 'green', 'both': 'purple'}
-        return format_html('<span style="color: {};">{}</span>',
-                          colors.get(obj.direction, 'gray'), obj.get_direction_display())
+        return _colored(colors.get(obj.direction, 'gray'), obj.get_direction_display())
     direction_display.short_description = '方向'
 
     def entry_range(self, obj):
@@ -885,16 +969,16 @@ class TradePlanAdmin(admin.ModelAdmin):
         if rr is None:
             return '-'
         color = 'green' if rr >= 2 else ('orange' if rr >= 1 else 'red')
-        return format_html('<span style="color: {};">1:{}</span>', color, rr)
+        return _colored(color, f'1:{rr}')
     rr_ratio_display.short_description = '盈亏比'
+    rr_ratio_display.admin_order_field = 'risk_reward_ratio'
 
     def status_display(self, obj):
         colors = {
             'draft': 'gray', 'pending': 'blue', 'partial': 'orange',
             'executed': 'green', 'cancelled': 'gray', 'expired': 'red'
         }
-        return format_html('<span style="color: {};">{}</span>',
-                          colors.get(obj.status, 'gray'), obj.get_status_display())
+        return _colored(colors.get(obj.status, 'gray'), obj.get_status_display())
     status_display.short_description = '状态'
 
     def is_valid_display(self, obj):
@@ -903,22 +987,28 @@ class TradePlanAdmin(admin.ModelAdmin):
         return format_html('<span style="color: gray;">无效</span>')
     is_valid_display.short_description = '有效性'
 
+    def _set_status(self, queryset, status):
+        """批量更新状态：单条 UPDATE，跳过状态未变化的行"""
+        from django.utils import timezone
+        return queryset.exclude(status=status).update(status=status, updated_at=timezone.now())
+
     @admin.action(description='标记为待执行')
     def mark_pending(self, request, queryset):
-        queryset.update(status='pending')
+        self._set_status(queryset, 'pending')
 
     @admin.action(description='标记为已取消')
     def mark_cancelled(self, request, queryset):
-        queryset.update(status='cancelled')
+        self._set_status(queryset, 'cancelled')
 
     @admin.action(description='标记为已过期')
     def mark_expired(self, request, queryset):
-        queryset.update(status='expired')
+        self._set_status(queryset, 'expired')
 
 
 @admin.register(DailyNote)
-class DailyNoteAdmin(admin.ModelAdmin):
+class DailyNoteAdmin(ChangelistDeferMixin, admin.ModelAdmin):
     """每日笔记管理界面"""
+    changelist_defer_fields = ('pre_market_plan', 'post_market_summary', 'lessons_learned', 'key_events')
     list_display = ['note_date', 'owner', 'market_outlook_display', 'mood_display',
                     'plan_stats', 'has_summary']
     list_filter = ['owner', 'market_outlook', 'mood', 'note_date']
@@ -941,13 +1031,26 @@ class DailyNoteAdmin(admin.ModelAdmin):
         }),
     )
 
+    def get_queryset(self, request):
+        # 盘后总结已延迟加载，是否已总结由数据库直接计算；执行率同样在 SQL 中计算以支持排序
+        return super().get_queryset(request).annotate(
+            _has_summary=Case(
+                When(post_market_summary='', then=Value(False)),
+                default=Value(True),
+                output_field=BooleanField(),
+            ),
+            _plan_rate=ExpressionWrapper(
+                F('executed_trades') * 100.0 / NullIf(F('planned_trades'), 0),
+                output_field=FloatField(),
+            ),
+        )
+
     def market_outlook_display(self, obj):
         if not obj.market_outlook:
             return '-'
         colors = {'bullish': 'red', 'bearish': 'green', 'neutral': 'gray', 'uncertain': 'orange'}
         labels = {'bullish': '看多', 'bearish': '看空', 'neutral': '中性', 'uncertain': '不确定'}
-        return format_html('<span style="color: {};">{}</span>',
-                          colors.get(obj.market_outlook, 'gray'), labels.get(obj.market_outlook, '-'))
+        return _colored(colors.get(obj.market_outlook, 'gray'), labels.get(obj.market_outlook, '-'))
     market_outlook_display.short_description = '市场展望'
 
     def mood_display(self, obj):
@@ -955,35 +1058,37 @@ class DailyNoteAdmin(admin.ModelAdmin):
             return '-'
         colors = {'great': 'green', 'good': 'blue', 'normal': 'gray', 'bad': 'orange', 'terrible': 'red'}
         labels = {'great': '很好', 'good': '不错', 'normal': '一般', 'bad': '不好', 'terrible': '很差'}
-        return format_html('<span style="color: {};">{}</span>',
-                          colors.get(obj.mood, 'gray'), labels.get(obj.mood, '-'))
+        return _colored(colors.get(obj.mood, 'gray'), labels.get(obj.mood, '-'))
     mood_display.short_description = '心情'
 
     def plan_stats(self, obj):
-        if obj.planned_trades == 0:
+        if obj._plan_rate is None:
             return '-'
-        rate = obj.plan_execution_rate
+        rate = round(obj._plan_rate, 1)
         color = 'green' if rate >= 80 else ('orange' if rate >= 50 else 'red')
         return format_html('{}/{} (<span style="color: {};">{}%</span>)',
                           obj.executed_trades, obj.planned_trades, color, rate)
     plan_stats.short_description = '计划执行'
+    plan_stats.admin_order_field = '_plan_rate'
 
     def has_summary(self, obj):
-        if obj.post_market_summary:
+        if obj._has_summary:
             return format_html('<span style="color: green;">已总结</span>')
         return format_html('<span style="color: gray;">未总结</span>')
     has_summary.short_description = '盘后总结'
 
 
 @admin.register(Notification)
-class NotificationAdmin(admin.ModelAdmin):
+class NotificationAdmin(ChangelistDeferMixin, admin.ModelAdmin):
     """通知消息管理界面"""
+    changelist_defer_fields = ('message', 'extra_data')
     list_display = ['created_at', 'owner', 'type_display', 'priority_display', 'title', 'is_read_display']
-    list_filter = ['notification_type', 'priority', 'is_read', 'owner', 'created_at']
+    list_filter = ['notification_type', 'priority', 'is_read',
+                   ('owner', admin.RelatedOnlyFieldListFilter), 'created_at']
     search_fields = ['title', 'message', 'owner__username']
     readonly_fields = ['created_at', 'read_at']
-    date_hierarchy = 'created_at'
     actions = ['mark_as_read', 'mark_as_unread']
+    action_batch_size = 2000
 
     fieldsets = (
         ('基本信息', {
@@ -1015,8 +1120,7 @@ class NotificationAdmin(admin.ModelAdmin):
             'system': 'gray',
         }
         color = colors.get(obj.notification_type, 'gray')
-        return format_html('<span style="color: {};">{}</span>',
-                          color, obj.get_notification_type_display())
+        return _colored(color, obj.get_notification_type_display())
     type_display.short_description = '类型'
 
     def priority_display(self, obj):
@@ -1032,23 +1136,35 @@ class NotificationAdmin(admin.ModelAdmin):
         return format_html('<span style="color: red; font-weight: bold;">未读</span>')
     is_read_display.short_description = '状态'
 
+    def _update_in_batches(self, queryset, **values):
+        """分批更新：每批取一段主键再按主键更新，单条语句锁定的行数有上限
+
+        调用方需保证更新后的行不再匹配 queryset，否则循环不会结束。
+        """
+        updated = 0
+        while True:
+            pks = list(queryset.values_list('pk', flat=True)[:self.action_batch_size])
+            if not pks:
+                return updated
+            updated += Notification.objects.filter(pk__in=pks).update(**values)
+
     @admin.action(description='标记为已读')
     def mark_as_read(self, request, queryset):
         from django.utils import timezone
-        queryset.update(is_read=True, read_at=timezone.now())
+        self._update_in_batches(queryset.filter(is_read=False), is_read=True, read_at=timezone.now())
 
     @admin.action(description='标记为未读')
     def mark_as_unread(self, request, queryset):
-        queryset.update(is_read=False, read_at=None)
+        self._update_in_batches(queryset.filter(is_read=True), is_read=False, read_at=None)
 
 
 @admin.register(PriceAlert)
-class PriceAlertAdmin(admin.ModelAdmin):
+class PriceAlertAdmin(SymbolSearchMixin, admin.ModelAdmin):
     """价格提醒管理界面"""
     list_display = ['symbol', 'owner', 'condition_display', 'target_price', 'last_price',
                     'status_display', 'trigger_count', 'created_at']
-    list_filter = ['status', 'condition', 'owner', 'created_at']
-    search_fields = ['symbol__code', 'symbol__name', 'owner__username', 'notes']
+    list_filter = ['status', 'condition', ('owner', admin.RelatedOnlyFieldListFilter), 'created_at']
+    search_fields = ['owner__username', 'notes']
     raw_id_fields = ['symbol']
     readonly_fields = ['triggered_at', 'trigger_count', 'last_price', 'created_at', 'updated_at']
     actions = ['cancel_alerts', 'reactivate_alerts']
@@ -1071,23 +1187,23 @@ class PriceAlertAdmin(admin.ModelAdmin):
 
     def condition_display(self, obj):
         colors = {'above': 'red', 'below': 'green', 'cross_up': 'orange', 'cross_down': 'blue'}
-        return format_html('<span style="color: {};">{}</span>',
-                          colors.get(obj.condition, 'gray'), obj.get_condition_display())
+        return _colored(colors.get(obj.condition, 'gray'), obj.get_condition_display())
     condition_display.short_description = '条件'
 
     def status_display(self, obj):
         colors = {'active': 'green', 'triggered': 'blue', 'cancelled': 'gray', 'expired': 'red'}
-        return format_html('<span style="color: {};">{}</span>',
-                          colors.get(obj.status, 'gray'), obj.get_status_display())
+        return _colored(colors.get(obj.status, 'gray'), obj.get_status_display())
     status_display.short_description = '状态'
 
     @admin.action(description='取消选中的提醒')
     def cancel_alerts(self, request, queryset):
-        queryset.filter(status='active').update(status='cancelled')
+        from django.utils import timezone
+        queryset.filter(status='active').update(status='cancelled', updated_at=timezone.now())
 
     @admin.action(description='重新激活选中的提醒')
     def reactivate_alerts(self, request, queryset):
-        queryset.exclude(status='active').update(status='active')
+        from django.utils import timezone
+        queryset.exclude(status='active').update(status='active', updated_at=timezone.now())
 
 
 @admin.register(NotificationSetting)
@@ -1134,23 +1250,26 @@ class TradeTagAdmin(admin.ModelAdmin):
     )
 
     def color_display(self, obj):
-        return format_html(
-            '<span style="background:{};color:white;padding:3px 10px;border-radius:3px;">{}</span>',
-            obj.color, obj.name
-        )
+        return _tag_badge(obj.color, obj.name)
     color_display.short_description = '预览'
 
+    def get_queryset(self, request):
+        # 交易数/盈利数在一次 GROUP BY 中统计，避免每行两次 COUNT 查询
+        return super().get_queryset(request).annotate(
+            _trade_count=Count('trade_logs'),
+            _win_count=Count('trade_logs', filter=Q(trade_logs__profit_loss__gt=0)),
+        )
+
     def trade_count(self, obj):
-        return obj.trade_logs.count()
+        return obj._trade_count
     trade_count.short_description = '交易数'
+    trade_count.admin_order_field = '_trade_count'
 
     def win_rate_display(self, obj):
-        trades = obj.trade_logs.all()
-        total = trades.count()
+        total = obj._trade_count
         if total == 0:
             return '-'
-        wins = trades.filter(profit_loss__gt=0).count()
-        rate = wins / total * 100
+        rate = obj._win_count / total * 100
         color = 'green' if rate >= 50 else 'red'
-        return format_html('<span style="color:{};">{:.1f}%</span>', color, rate)
+        return format_html('<span style="color:{};">{}%</span>', color, f'{rate:.1f}')
     win_rate_display.short_description = '胜率'
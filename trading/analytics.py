@@ -2,12 +2,234 @@
 交易深度分析模块
 提供多维度的交易数据统计和分析
 """
-from django.db.models import Sum, Count, Avg, Max, Min, F, Q, Case, When, Value, IntegerField
-from django.db.models.functions import TruncDate, TruncHour, TruncWeek, TruncMonth, ExtractHour, ExtractWeekDay
+from django.db.models import (Sum, Count, Avg, Max, Min, F, Q, Case, When, Value, IntegerField,
+                              ExpressionWrapper, FloatField)
+from django.db.models.functions import TruncDate, TruncHour, TruncWeek, TruncMonth, ExtractHour, ExtractWeekDay, Cast
+from django.core.cache import cache
 from django.utils import timezone
-from datetime import timedelta
+from datetime import timedelta, datetime, time as dt_time, timezone as dt_timezone
 from decimal import Decimal
 from collections import defaultdict
+from array import array
+import logging
+import time
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# 完整报告一次性加载的成交字段，各维度统计均在内存中完成
+REPORT_ROW_FIELDS = (
+    'trade_time', 'profit_loss', 'commission', 'quantity', 'side',
+    'symbol_id', 'strategy_id',
+)
+
+
+# 维度显示名称，模块加载时生成一次；小时/星期按整数下标取值
+HOUR_DISPLAY = tuple(f'{h:02d}:00-{h:02d}:59' for h in range(24))
+# 与 ExtractWeekDay 一致：周日=1 ... 周六=7
+WEEKDAY_DISPLAY = ('', '周日', '周一', '周二', '周三', '周四', '周五', '周六')
+SIDE_NAMES = {'buy': '买入/做多', 'sell': '卖出/做空'}
+SYMBOL_TYPE_NAMES = {
+    'stock': '股票', 'futures': '期货', 'forex': '外汇',
+    'crypto': '加密货币', 'index': '指数', 'commodity': '商品',
+    'bond': '债券', 'etf': 'ETF'
+}
+
+# 未指定开始日期时默认分析最近一年，避免无界扫描全部历史成交
+DEFAULT_LOOKBACK_DAYS = 365
+
+# 完整报告缓存：包含今天的区间缓存1小时，已结束的历史区间缓存1天
+REPORT_CACHE_TIMEOUT = 60 * 60
+REPORT_CACHE_TIMEOUT_PAST = 24 * 60 * 60
+
+
+def _report_version_key(user_id):
+    return f'trade_analytics:version:{user_id}'
+
+
+def get_report_version(user_id):
+    """获取用户分析报告缓存版本号，不存在时以当前时间初始化；缓存不可用时返回 None"""
+    key = _report_version_key(user_id)
+    try:
+        version = cache.get(key)
+        if version is None:
+            cache.add(key, time.time_ns(), None)
+            version = cache.get(key)
+    except Exception as e:
+        logger.warning(f'读取分析报告缓存版本失败: {e}')
+        return None
+    return version
+
+
+def invalidate_report_cache(user_id):
+    """使用户的全部分析报告缓存失效（更新版本号，旧缓存自然过期）
+
+    缓存不可用时只记录日志：交易已提交，不能因缓存故障让保存/删除报错
+    """
+    try:
+        cache.set(_report_version_key(user_id), time.time_ns(), None)
+    except Exception as e:
+        logger.warning(f'分析报告缓存失效失败: {e}')
+
+
+class _GroupStats:
+    """单个分组的累加器，输出字段与 ORM annotate 结果一致"""
+    __slots__ = ('total_trades', 'win_trades', 'loss_trades', 'total_pnl', 'win_pnl', 'loss_pnl',
+                 'max_profit', 'max_loss', 'total_commission', 'total_quantity',
+                 'first_trade', 'last_trade')
+
+    def __init__(self):
+        self.total_trades = 0
+        self.win_trades = 0
+        self.loss_trades = 0
+        self.total_pnl = Decimal('0')
+        self.win_pnl = Decimal('0')
+        self.loss_pnl = Decimal('0')
+        self.max_profit = None
+        self.max_loss = None
+        self.total_commission = Decimal('0')
+        self.total_quantity = Decimal('0')
+        self.first_trade = None
+        self.last_trade = None
+
+    def add(self, row):
+        pnl = row.profit_loss or 0
+        self.total_trades += 1
+        self.total_pnl += pnl
+        self.total_commission += row.commission or 0
+        self.total_quantity += row.quantity or 0
+        if pnl > 0:
+            self.win_trades += 1
+            self.win_pnl += pnl
+            if self.max_profit is None or pnl > self.max_profit:
+                self.max_profit = pnl
+        elif pnl < 0:
+            self.loss_trades += 1
+            self.loss_pnl += pnl
+            if self.max_loss is None or pnl < self.max_loss:
+                self.max_loss = pnl
+        # 行已按成交时间升序加载
+        if self.first_trade is None:
+            self.first_trade = row.trade_time
+        self.last_trade = row.trade_time
+
+    def as_stat(self, **keys):
+        total = self.total_trades
+        stat = {
+            'total_trades': total,
+            'win_trades': self.win_trades,
+            'loss_trades': self.loss_trades,
+            'total_pnl': self.total_pnl,
+            'avg_pnl': self.total_pnl / total if total else None,
+            'avg_win': self.win_pnl / self.win_trades if self.win_trades else None,
+            'avg_loss': self.loss_pnl / self.loss_trades if self.loss_trades else None,
+            'max_profit': self.max_profit,
+            'max_loss': self.max_loss,
+            'total_commission': self.total_commission,
+            'total_quantity': self.total_quantity,
+            'avg_quantity': self.total_quantity / total if total else None,
+            'first_trade': self.first_trade,
+            'last_trade': self.last_trade,
+        }
+        stat.update(keys)
+        return stat
+
+
+def _f(value):
+    """数据库聚合值转 float，None 视为 0
+
+    报告输出保持数值类型而非 Decimal 字符串：分析页前端直接对数值做比较、
+    toLocaleString 格式化和绘图。金额的加减（如净盈亏）先用 Decimal 计算，
+    每个输出字段只在这里转换一次。
+    """
+    if value is None:
+        return 0.0
+    return value if type(value) is float else float(value)
+
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+_MICROSECOND = timedelta(microseconds=1)
+_STREAK_TYPES = {1: 'win', -1: 'loss', 0: 'even'}
+
+
+def _pnl_sign(pnl):
+    if not pnl:
+        return 0
+    return 1 if pnl > 0 else -1
+
+
+def _compute_streaks(signs, time_at, history_size=10):
+    """按游程（run-length）向量化统计连续盈亏
+
+    Args:
+        signs: 按成交时间排序的盈亏符号数组（1 盈 / -1 亏 / 0 平）
+        time_at: 下标 -> 成交时间，只在最近几段的边界上调用
+    """
+    n = signs.size
+    if not n:
+        return {
+            'max_win_streak': 0,
+            'max_loss_streak': 0,
+            'current_streak': 0,
+            'current_streak_type': None,
+            'streaks_history': []
+        }
+
+    # 每段连续记录的起点、长度和类型
+    starts = np.concatenate(([0], np.flatnonzero(signs[1:] != signs[:-1]) + 1))
+    lengths = np.diff(np.append(starts, n))
+    run_signs = signs[starts]
+
+    win_lengths = lengths[run_signs == 1]
+    loss_lengths = lengths[run_signs == -1]
+
+    # 最近N段；结束时间沿用原逻辑：取下一段首笔成交时间，最后一段取最后一笔
+    history = []
+    for i in range(max(len(starts) - history_size, 0), len(starts)):
+        end_index = starts[i + 1] if i + 1 < len(starts) else n - 1
+        history.append({
+            'type': _STREAK_TYPES[int(run_signs[i])],
+            'count': int(lengths[i]),
+            'end_date': time_at(int(end_index))
+        })
+
+    return {
+        'max_win_streak': int(win_lengths.max()) if win_lengths.size else 0,
+        'max_loss_streak': int(loss_lengths.max()) if loss_lengths.size else 0,
+        'current_streak': int(lengths[-1]),
+        'current_streak_type': _STREAK_TYPES[int(run_signs[-1])],
+        'streaks_history': history  # 最近10次连续记录
+    }
+
+
+def _scalar_column(qs, name, chunk_size=2000):
+    """流式读取单列值
+
+    只需一列时统一用 values_list(flat=True).iterator()：只 SELECT 该列，
+    不构造模型实例，也不缓存整个结果集。
+    """
+    return qs.values_list(name, flat=True).iterator(chunk_size=chunk_size)
+
+
+def _group_rows(rows, key_func, key_names):
+    """按 key_func 对已加载的成交行分组统计
+
+    Args:
+        rows: _load_rows() 返回的成交行
+        key_func: 行 -> 分组键（元组，与 key_names 一一对应）
+        key_names: 分组键在结果中的字段名
+    Returns:
+        与 ORM values().annotate() 同结构的字典列表（未排序）
+    """
+    groups = {}
+    for row in rows:
+        key = key_func(row)
+        group = groups.get(key)
+        if group is None:
+            group = groups[key] = _GroupStats()
+        group.add(row)
+    return [group.as_stat(**dict(zip(key_names, key))) for key, group in groups.items()]
 
 
 class TradeAnalytics:
@@ -19,40 +241,140 @@ class TradeAnalytics:
         Args:
             user: 用户对象
             account: 可选，指定账户
-            start_date: 开始日期
-            end_date: 结束日期
+            start_date: 开始日期，默认为结束日期前 DEFAULT_LOOKBACK_DAYS 天
+            end_date: 结束日期，默认为今天
         """
         self.user = user
         self.account = account
-        self.start_date = start_date
-        self.end_date = end_date or timezone.now().date()
+        self.end_date = end_date or timezone.localdate()
+        self.start_date = start_date or self.end_date - timedelta(days=DEFAULT_LOOKBACK_DAYS)
 
         # 延迟导入避免循环引用
-        from .models import TradeLog, Account
+        from .models import TradeLog, Account, Symbol, Strategy, SymbolDailyStat
         self.TradeLog = TradeLog
         self.Account = Account
+        self.SymbolDailyStat = SymbolDailyStat
+        self.Symbol = Symbol
+        self.Strategy = Strategy
+
+        # 标的/策略的名称等维度信息，按 id 查询一次后缓存在实例上
+        self._symbol_cache = {}
+        self._strategy_cache = {}
+        self._has_data_cache = None
 
     def get_base_queryset(self):
-        """获取基础查询集"""
+        """获取基础查询集
+
+        各分析方法都通过 values()/values_list()/aggregate() 取列，关联字段
+        （symbol__code、strategy__name 等）在同一条 SQL 中 JOIN 取回，不会实例化
+        模型对象，因此这里无需 select_related（对这些查询不产生任何效果）。
+        """
         qs = self.TradeLog.objects.filter(
             account__owner=self.user,
             status='filled'
         )
         if self.account:
             qs = qs.filter(account=self.account)
-        if self.start_date:
-            qs = qs.filter(trade_time__date__gte=self.start_date)
-        if self.end_date:
-            qs = qs.filter(trade_time__date__lte=self.end_date)
+        # 用成交时间区间代替 trade_time__date，条件可直接走 (account, status, trade_time) 索引
+        qs = qs.filter(
+            trade_time__gte=timezone.make_aware(datetime.combine(self.start_date, dt_time.min)),
+            trade_time__lt=timezone.make_aware(datetime.combine(self.end_date + timedelta(days=1), dt_time.min)),
+        )
         return qs
 
+    def get_daily_stat_queryset(self):
+        """获取标的日统计查询集（已按交易日汇总，行数远少于原始成交）
+
+        标的、标的类型、星期、月度分析基于该表聚合；时段、方向、策略、
+        连续盈亏和盈亏分布需要逐笔数据，仍走原始成交。
+        """
+        qs = self.SymbolDailyStat.objects.filter(
+            account__owner=self.user,
+            trade_date__gte=self.start_date,
+            trade_date__lte=self.end_date,
+        )
+        if self.account:
+            qs = qs.filter(account=self.account)
+        return qs
+
+    @staticmethod
+    def _daily_stat_aggregates():
+        """标的日统计上的通用聚合（笔数/胜负/盈亏合计/平均盈亏）"""
+        return {
+            'total_trades': Sum('trade_count'),
+            'win_trades': Sum('win_count'),
+            'loss_trades': Sum('loss_count'),
+            'total_pnl': Sum('profit_loss'),
+            'avg_pnl': ExpressionWrapper(
+                Cast(Sum('profit_loss'), FloatField()) / Sum('trade_count'), output_field=FloatField()
+            ),
+        }
+
+    def _symbol_info(self, symbol_ids):
+        """标的 id -> (代码, 名称, 类型)"""
+        missing = set(symbol_ids) - self._symbol_cache.keys()
+        if missing:
+            self._symbol_cache.update(
+                (pk, (code, name, symbol_type))
+                for pk, code, name, symbol_type in self.Symbol.objects.filter(pk__in=missing).values_list(
+                    'pk', 'code', 'name', 'symbol_type'
+                )
+            )
+        return self._symbol_cache
+
+    def _strategy_names(self, strategy_ids):
+        """策略 id -> 名称"""
+        missing = set(strategy_ids) - self._strategy_cache.keys() - {None}
+        if missing:
+            self._strategy_cache.update(
+                self.Strategy.objects.filter(pk__in=missing).values_list('pk', 'name')
+            )
+        return self._strategy_cache
+
+    def _with_symbol_info(self, stats):
+        """为按 symbol_id 分组的统计补充标的代码、名称和类型"""
+        stats = list(stats)
+        info = self._symbol_info(stat['symbol_id'] for stat in stats)
+        for stat in stats:
+            stat['symbol__code'], stat['symbol__name'], stat['symbol__symbol_type'] = info[stat['symbol_id']]
+        return stats
+
+    def _load_rows(self):
+        """一次性加载筛选范围内的成交记录（按成交时间升序），供完整报告复用"""
+        qs = self.get_base_queryset().order_by('trade_time').values_list(*REPORT_ROW_FIELDS, named=True)
+        rows = list(qs.iterator(chunk_size=5000))
+        self._has_data_cache = bool(rows)
+        return rows
+
+    def _has_data(self):
+        """筛选范围内是否有成交，EXISTS 结果缓存在实例上"""
+        if self._has_data_cache is None:
+            self._has_data_cache = self.get_base_queryset().exists()
+        return self._has_data_cache
+
+    def _rows_or_empty(self, rows):
+        """没有成交时返回空行，各分析直接在内存中得到空结果，不再发起聚合查询"""
+        if rows is None and not self._has_data():
+            return ()
+        return rows
+
     # ==================== 时段分析 ====================
 
-    def analyze_by_hour(self):
+    def analyze_by_hour(self, rows=None):
         """按小时分析交易表现"""
-        qs = self.get_base_queryset()
+        rows = self._rows_or_empty(rows)
+        if rows is not None:
+            hourly_stats = sorted(
+                _group_rows(rows, lambda r: (timezone.localtime(r.trade_time).hour,), ('hour',)),
+                key=lambda x: x['hour']
+            )
+        else:
+            hourly_stats = self._hour_stats_queryset().order_by('hour')
+        return [self._format_hour_stat(stat) for stat in hourly_stats]
 
-        hourly_stats = qs.annotate(
+    def _hour_stats_queryset(self):
+        """按小时分组的聚合查询（未排序）"""
+        return self.get_base_queryset().annotate(
             hour=ExtractHour('trade_time')
         ).values('hour').annotate(
             total_trades=Count('id'),
@@ -62,45 +384,40 @@ class TradeAnalytics:
             avg_pnl=Avg('profit_loss'),
             max_profit=Max('profit_loss', filter=Q(profit_loss__gt=0)),
             max_loss=Min('profit_loss', filter=Q(profit_loss__lt=0)),
-        ).order_by('hour')
+        )
 
-        results = []
-        for stat in hourly_stats:
-            total = stat['total_trades']
-            wins = stat['win_trades'] or 0
-            win_rate = (wins / total * 100) if total > 0 else 0
-            results.append({
-                'hour': stat['hour'],
-                'hour_display': f"{stat['hour']:02d}:00-{stat['hour']:02d}:59",
-                'total_trades': total,
-                'win_trades': wins,
-                'loss_trades': stat['loss_trades'] or 0,
-                'win_rate': round(win_rate, 2),
-                'total_pnl': float(stat['total_pnl'] or 0),
-                'avg_pnl': float(stat['avg_pnl'] or 0),
-                'max_profit': float(stat['max_profit'] or 0),
-                'max_loss': float(stat['max_loss'] or 0),
-            })
-        return results
+    @staticmethod
+    def _format_hour_stat(stat):
+        total = stat['total_trades']
+        wins = stat['win_trades'] or 0
+        win_rate = (wins / total * 100) if total > 0 else 0
+        return {
+            'hour': stat['hour'],
+            'hour_display': HOUR_DISPLAY[stat['hour']],
+            'total_trades': total,
+            'win_trades': wins,
+            'loss_trades': stat['loss_trades'] or 0,
+            'win_rate': round(win_rate, 2),
+            'total_pnl': _f(stat['total_pnl']),
+            'avg_pnl': _f(stat['avg_pnl']),
+            'max_profit': _f(stat['max_profit']),
+            'max_loss': _f(stat['max_loss']),
+        }
 
-    def analyze_by_weekday(self):
+    def analyze_by_weekday(self, rows=None):
         """按星期几分析交易表现"""
-        qs = self.get_base_queryset()
-
-        weekday_stats = qs.annotate(
-            weekday=ExtractWeekDay('trade_time')
-        ).values('weekday').annotate(
-            total_trades=Count('id'),
-            win_trades=Count('id', filter=Q(profit_loss__gt=0)),
-            loss_trades=Count('id', filter=Q(profit_loss__lt=0)),
-            total_pnl=Sum('profit_loss'),
-            avg_pnl=Avg('profit_loss'),
-        ).order_by('weekday')
-
-        weekday_names = {
-            1: '周日', 2: '周一', 3: '周二', 4: '周三',
-            5: '周四', 6: '周五', 7: '周六'
-        }
+        rows = self._rows_or_empty(rows)
+        if rows is not None:
+            # 与 ExtractWeekDay 一致：周日=1 ... 周六=7
+            weekday_stats = sorted(
+                _group_rows(rows, lambda r: (timezone.localtime(r.trade_time).isoweekday() % 7 + 1,),
+                            ('weekday',)),
+                key=lambda x: x['weekday']
+            )
+        else:
+            weekday_stats = self.get_daily_stat_queryset().values(
+                weekday=ExtractWeekDay('trade_date')
+            ).annotate(**self._daily_stat_aggregates()).order_by('weekday')
 
         results = []
         for stat in weekday_stats:
@@ -109,76 +426,80 @@ class TradeAnalytics:
             win_rate = (wins / total * 100) if total > 0 else 0
             results.append({
                 'weekday': stat['weekday'],
-                'weekday_name': weekday_names.get(stat['weekday'], '未知'),
+                'weekday_name': WEEKDAY_DISPLAY[stat['weekday']],
                 'total_trades': total,
                 'win_trades': wins,
                 'loss_trades': stat['loss_trades'] or 0,
                 'win_rate': round(win_rate, 2),
-                'total_pnl': float(stat['total_pnl'] or 0),
-                'avg_pnl': float(stat['avg_pnl'] or 0),
+                'total_pnl': _f(stat['total_pnl']),
+                'avg_pnl': _f(stat['avg_pnl']),
             })
         return results
 
     # ==================== 品种分析 ====================
 
-    def analyze_by_symbol(self):
+    def analyze_by_symbol(self, rows=None):
         """按交易标的分析表现"""
-        qs = self.get_base_queryset()
+        rows = self._rows_or_empty(rows)
+        if rows is not None:
+            symbol_stats = sorted(
+                _group_rows(rows, lambda r: (r.symbol_id,), ('symbol_id',)),
+                key=lambda x: x['total_pnl'], reverse=True
+            )
+        else:
+            symbol_stats = self._symbol_stats_queryset().order_by('-total_pnl')
+        return [self._format_symbol_stat(stat) for stat in self._with_symbol_info(symbol_stats)]
 
-        symbol_stats = qs.values(
-            'symbol__code', 'symbol__name', 'symbol__symbol_type'
-        ).annotate(
-            total_trades=Count('id'),
-            win_trades=Count('id', filter=Q(profit_loss__gt=0)),
-            loss_trades=Count('id', filter=Q(profit_loss__lt=0)),
-            total_pnl=Sum('profit_loss'),
-            avg_pnl=Avg('profit_loss'),
+    def _symbol_stats_queryset(self):
+        """按标的分组的聚合查询（未排序）
+
+        只按 symbol_id 分组不做 JOIN，标的名称等由 _with_symbol_info 补充
+        """
+        return self.get_daily_stat_queryset().values('symbol_id').annotate(
+            **self._daily_stat_aggregates(),
             total_commission=Sum('commission'),
-            avg_quantity=Avg('quantity'),
-            first_trade=Min('trade_time'),
-            last_trade=Max('trade_time'),
-        ).order_by('-total_pnl')
+            avg_quantity=ExpressionWrapper(
+                Cast(Sum('quantity'), FloatField()) / Sum('trade_count'), output_field=FloatField()
+            ),
+            first_trade=Min('first_trade_time'),
+            last_trade=Max('last_trade_time'),
+        )
 
-        results = []
-        for stat in symbol_stats:
-            total = stat['total_trades']
-            wins = stat['win_trades'] or 0
-            win_rate = (wins / total * 100) if total > 0 else 0
-            results.append({
-                'symbol_code': stat['symbol__code'],
-                'symbol_name': stat['symbol__name'],
-                'symbol_type': stat['symbol__symbol_type'],
-                'total_trades': total,
-                'win_trades': wins,
-                'loss_trades': stat['loss_trades'] or 0,
-                'win_rate': round(win_rate, 2),
-                'total_pnl': float(stat['total_pnl'] or 0),
-                'avg_pnl': float(stat['avg_pnl'] or 0),
-                'total_commission': float(stat['total_commission'] or 0),
-                'net_pnl': float((stat['total_pnl'] or 0) - (stat['total_commission'] or 0)),
-                'avg_quantity': float(stat['avg_quantity'] or 0),
-                'first_trade': stat['first_trade'],
-                'last_trade': stat['last_trade'],
-            })
-        return results
+    @staticmethod
+    def _format_symbol_stat(stat):
+        total = stat['total_trades']
+        wins = stat['win_trades'] or 0
+        win_rate = (wins / total * 100) if total > 0 else 0
+        return {
+            'symbol_code': stat['symbol__code'],
+            'symbol_name': stat['symbol__name'],
+            'symbol_type': stat['symbol__symbol_type'],
+            'total_trades': total,
+            'win_trades': wins,
+            'loss_trades': stat['loss_trades'] or 0,
+            'win_rate': round(win_rate, 2),
+            'total_pnl': _f(stat['total_pnl']),
+            'avg_pnl': _f(stat['avg_pnl']),
+            'total_commission': _f(stat['total_commission']),
+            'net_pnl': float((stat['total_pnl'] or 0) - (stat['total_commission'] or 0)),
+            'avg_quantity': _f(stat['avg_quantity']),
+            'first_trade': stat['first_trade'],
+            'last_trade': stat['last_trade'],
+        }
 
-    def analyze_by_symbol_type(self):
+    def analyze_by_symbol_type(self, rows=None):
         """按标的类型分析表现"""
-        qs = self.get_base_queryset()
-
-        type_stats = qs.values('symbol__symbol_type').annotate(
-            total_trades=Count('id'),
-            win_trades=Count('id', filter=Q(profit_loss__gt=0)),
-            loss_trades=Count('id', filter=Q(profit_loss__lt=0)),
-            total_pnl=Sum('profit_loss'),
-            avg_pnl=Avg('profit_loss'),
-        ).order_by('-total_pnl')
-
-        type_names = {
-            'stock': '股票', 'futures': '期货', 'forex': '外汇',
-            'crypto': '加密货币', 'index': '指数', 'commodity': '商品',
-            'bond': '债券', 'etf': 'ETF'
-        }
+        rows = self._rows_or_empty(rows)
+        if rows is not None:
+            info = self._symbol_info({r.symbol_id for r in rows})
+            type_stats = sorted(
+                _group_rows(rows, lambda r: (info[r.symbol_id][2],), ('symbol__symbol_type',)),
+                key=lambda x: x['total_pnl'], reverse=True
+            )
+        else:
+            type_stats = self.get_daily_stat_queryset().values('symbol__symbol_type').annotate(
+                **self._daily_stat_aggregates()
+            ).order_by('-total_pnl')
 
         results = []
         for stat in type_stats:
@@ -187,34 +508,43 @@ class TradeAnalytics:
             win_rate = (wins / total * 100) if total > 0 else 0
             results.append({
                 'symbol_type': stat['symbol__symbol_type'],
-                'type_name': type_names.get(stat['symbol__symbol_type'], '其他'),
+                'type_name': SYMBOL_TYPE_NAMES.get(stat['symbol__symbol_type'], '其他'),
                 'total_trades': total,
                 'win_trades': wins,
                 'loss_trades': stat['loss_trades'] or 0,
                 'win_rate': round(win_rate, 2),
-                'total_pnl': float(stat['total_pnl'] or 0),
-                'avg_pnl': float(stat['avg_pnl'] or 0),
+                'total_pnl': _f(stat['total_pnl']),
+                'avg_pnl': _f(stat['avg_pnl']),
             })
         return results
 
     # ==================== 策略分析 ====================
 
-    def analyze_by_strategy(self):
+    def analyze_by_strategy(self, rows=None):
         """按策略分析表现"""
-        qs = self.get_base_queryset()
-
-        strategy_stats = qs.values(
-            'strategy__id', 'strategy__name'
-        ).annotate(
-            total_trades=Count('id'),
-            win_trades=Count('id', filter=Q(profit_loss__gt=0)),
-            loss_trades=Count('id', filter=Q(profit_loss__lt=0)),
-            total_pnl=Sum('profit_loss'),
-            avg_pnl=Avg('profit_loss'),
-            max_profit=Max('profit_loss', filter=Q(profit_loss__gt=0)),
-            max_loss=Min('profit_loss', filter=Q(profit_loss__lt=0)),
-            total_commission=Sum('commission'),
-        ).order_by('-total_pnl')
+        rows = self._rows_or_empty(rows)
+        if rows is not None:
+            strategy_stats = sorted(
+                _group_rows(rows, lambda r: (r.strategy_id,), ('strategy_id',)),
+                key=lambda x: x['total_pnl'], reverse=True
+            )
+        else:
+            # 只按 strategy_id 分组不做 JOIN，策略名称单独查询一次
+            strategy_stats = self.get_base_queryset().values('strategy_id').annotate(
+                total_trades=Count('id'),
+                win_trades=Count('id', filter=Q(profit_loss__gt=0)),
+                loss_trades=Count('id', filter=Q(profit_loss__lt=0)),
+                total_pnl=Sum('profit_loss'),
+                avg_pnl=Avg('profit_loss'),
+                max_profit=Max('profit_loss', filter=Q(profit_loss__gt=0)),
+                max_loss=Min('profit_loss', filter=Q(profit_loss__lt=0)),
+                avg_win=Avg('profit_loss', filter=Q(profit_loss__gt=0)),
+                avg_loss=Avg('profit_loss', filter=Q(profit_loss__lt=0)),
+                total_commission=Sum('commission'),
+            ).order_by('-total_pnl')
+
+        strategy_stats = list(strategy_stats)
+        names = self._strategy_names(stat['strategy_id'] for stat in strategy_stats)
 
         results = []
         for stat in strategy_stats:
@@ -223,28 +553,21 @@ class TradeAnalytics:
             win_rate = (wins / total * 100) if total > 0 else 0
 
             # 计算盈亏比
-            avg_win = 0
-            avg_loss = 0
-            if wins > 0:
-                win_qs = qs.filter(strategy_id=stat['strategy__id'], profit_loss__gt=0)
-                avg_win = win_qs.aggregate(avg=Avg('profit_loss'))['avg'] or 0
-            losses = stat['loss_trades'] or 0
-            if losses > 0:
-                loss_qs = qs.filter(strategy_id=stat['strategy__id'], profit_loss__lt=0)
-                avg_loss = abs(loss_qs.aggregate(avg=Avg('profit_loss'))['avg'] or 0)
+            avg_win = stat['avg_win'] or 0
+            avg_loss = abs(stat['avg_loss'] or 0)
             profit_factor = (avg_win / avg_loss) if avg_loss > 0 else 0
 
             results.append({
-                'strategy_id': stat['strategy__id'],
-                'strategy_name': stat['strategy__name'] or '无策略',
+                'strategy_id': stat['strategy_id'],
+                'strategy_name': names.get(stat['strategy_id']) or '无策略',
                 'total_trades': total,
                 'win_trades': wins,
                 'loss_trades': stat['loss_trades'] or 0,
                 'win_rate': round(win_rate, 2),
-                'total_pnl': float(stat['total_pnl'] or 0),
-                'avg_pnl': float(stat['avg_pnl'] or 0),
-                'max_profit': float(stat['max_profit'] or 0),
-                'max_loss': float(stat['max_loss'] or 0),
+                'total_pnl': _f(stat['total_pnl']),
+                'avg_pnl': _f(stat['avg_pnl']),
+                'max_profit': _f(stat['max_profit']),
+                'max_loss': _f(stat['max_loss']),
                 'profit_factor': round(profit_factor, 2),
                 'net_pnl': float((stat['total_pnl'] or 0) - (stat['total_commission'] or 0)),
             })
@@ -252,19 +575,22 @@ class TradeAnalytics:
 
     # ==================== 方向分析 ====================
 
-    def analyze_by_side(self):
+    def analyze_by_side(self, rows=None):
         """按交易方向分析"""
-        qs = self.get_base_queryset()
-
-        side_stats = qs.values('side').annotate(
-            total_trades=Count('id'),
-            win_trades=Count('id', filter=Q(profit_loss__gt=0)),
-            loss_trades=Count('id', filter=Q(profit_loss__lt=0)),
-            total_pnl=Sum('profit_loss'),
-            avg_pnl=Avg('profit_loss'),
-        ).order_by('side')
-
-        side_names = {'buy': '买入/做多', 'sell': '卖出/做空'}
+        rows = self._rows_or_empty(rows)
+        if rows is not None:
+            side_stats = sorted(
+                _group_rows(rows, lambda r: (r.side,), ('side',)),
+                key=lambda x: x['side']
+            )
+        else:
+            side_stats = self.get_base_queryset().values('side').annotate(
+                total_trades=Count('id'),
+                win_trades=Count('id', filter=Q(profit_loss__gt=0)),
+                loss_trades=Count('id', filter=Q(profit_loss__lt=0)),
+                total_pnl=Sum('profit_loss'),
+                avg_pnl=Avg('profit_loss'),
+            ).order_by('side')
 
         results = []
         for stat in side_stats:
@@ -273,112 +599,72 @@ class TradeAnalytics:
             win_rate = (wins / total * 100) if total > 0 else 0
             results.append({
                 'side': stat['side'],
-                'side_name': side_names.get(stat['side'], stat['side']),
+                'side_name': SIDE_NAMES.get(stat['side'], stat['side']),
                 'total_trades': total,
                 'win_trades': wins,
                 'loss_trades': stat['loss_trades'] or 0,
                 'win_rate': round(win_rate, 2),
-                'total_pnl': float(stat['total_pnl'] or 0),
-                'avg_pnl': float(stat['avg_pnl'] or 0),
+                'total_pnl': _f(stat['total_pnl']),
+                'avg_pnl': _f(stat['avg_pnl']),
             })
         return results
 
     # ==================== 连续统计 ====================
 
-    def analyze_streaks(self):
+    def analyze_streaks(self, rows=None):
         """分析连续盈亏记录"""
-        qs = self.get_base_queryset().order_by('trade_time')
-
-        trades = list(qs.values('id', 'trade_time', 'profit_loss', 'symbol__code'))
-
-        if not trades:
-            return {
-                'max_win_streak': 0,
-                'max_loss_streak': 0,
-                'current_streak': 0,
-                'current_streak_type': None,
-                'streaks_history': []
-            }
-
-        # 计算连续记录
-        streaks = []
-        current_streak = 0
-        current_type = None
-
-        max_win_streak = 0
-        max_loss_streak = 0
-
-        for trade in trades:
-            pnl = trade['profit_loss'] or 0
-            if pnl > 0:
-                trade_type = 'win'
-            elif pnl < 0:
-                trade_type = 'loss'
-            else:
-                trade_type = 'even'
-
-            if trade_type == current_type:
-                current_streak += 1
-            else:
-                if current_streak > 0 and current_type:
-                    streaks.append({
-                        'type': current_type,
-                        'count': current_streak,
-                        'end_date': trade['trade_time']
-                    })
-                current_streak = 1
-                current_type = trade_type
-
-            if trade_type == 'win':
-                max_win_streak = max(max_win_streak, current_streak)
-            elif trade_type == 'loss':
-                max_loss_streak = max(max_loss_streak, current_streak)
-
-        # 添加最后一个连续记录
-        if current_streak > 0 and current_type:
-            streaks.append({
-                'type': current_type,
-                'count': current_streak,
-                'end_date': trades[-1]['trade_time']
-            })
-
-        return {
-            'max_win_streak': max_win_streak,
-            'max_loss_streak': max_loss_streak,
-            'current_streak': current_streak,
-            'current_streak_type': current_type,
-            'streaks_history': streaks[-10:]  # 最近10次连续记录
-        }
+        rows = self._rows_or_empty(rows)
+        if rows is not None:
+            signs = np.fromiter((_pnl_sign(r.profit_loss) for r in rows), dtype=np.int8, count=len(rows))
+            return _compute_streaks(signs, lambda i: rows[i].trade_time)
+
+        # 流式读取两列，压缩为定长数组（每笔约9字节）后再向量化计算
+        signs = array('b')
+        times = array('q')
+        trades = self.get_base_queryset().order_by('trade_time').values_list(
+            'trade_time', 'profit_loss'
+        ).iterator(chunk_size=2000)
+        for trade_time, pnl in trades:
+            signs.append(_pnl_sign(pnl))
+            times.append((trade_time - _EPOCH) // _MICROSECOND)
+        return _compute_streaks(
+            np.frombuffer(signs, dtype=np.int8),
+            lambda i: _EPOCH + timedelta(microseconds=times[i])
+        )
 
     # ==================== 盈亏分布 ====================
 
-    def analyze_pnl_distribution(self):
+    def analyze_pnl_distribution(self, rows=None):
         """分析盈亏金额分布"""
-        qs = self.get_base_queryset()
-
-        trades = list(qs.values_list('profit_loss', flat=True))
-        if not trades:
+        rows = self._rows_or_empty(rows)
+        if rows is not None:
+            values = (r.profit_loss for r in rows)
+        else:
+            values = _scalar_column(self.get_base_queryset(), 'profit_loss')
+        trades = np.fromiter((float(t) for t in values if t is not None), dtype=np.float64)
+        if not trades.size:
             return {'buckets': [], 'stats': {}}
 
-        trades = [float(t) for t in trades if t is not None]
-
-        # 计算统计数据
-        total = len(trades)
-        wins = [t for t in trades if t > 0]
-        losses = [t for t in trades if t < 0]
+        # 计算统计数据：用布尔掩码原地归约，不再复制盈利/亏损子数组
+        total = int(trades.size)
+        win_mask = trades > 0
+        loss_mask = trades < 0
+        win_count = int(np.count_nonzero(win_mask))
+        loss_count = int(np.count_nonzero(loss_mask))
+        total_pnl = float(trades.sum())
 
         stats = {
             'total_trades': total,
-            'win_count': len(wins),
-            'loss_count': len(losses),
-            'even_count': total - len(wins) - len(losses),
-            'total_pnl': sum(trades),
-            'avg_pnl': sum(trades) / total if total > 0 else 0,
-            'avg_win': sum(wins) / len(wins) if wins else 0,
-            'avg_loss': sum(losses) / len(losses) if losses else 0,
-            'max_win': max(wins) if wins else 0,
-            'max_loss': min(losses) if losses else 0,
-            'win_rate': len(wins) / total * 100 if total > 0 else 0,
+            'win_count': win_count,
+            'loss_count': loss_count,
+            'even_count': total - win_count - loss_count,
+            'total_pnl': total_pnl,
+            'avg_pnl': total_pnl / total,
+            'avg_win': float(trades.sum(where=win_mask)) / win_count if win_count else 0,
+            'avg_loss': float(trades.sum(where=loss_mask)) / loss_count if loss_count else 0,
+            'max_win': float(trades.max(where=win_mask, initial=0.0)) if win_count else 0,
+            'max_loss': float(trades.min(where=loss_mask, initial=0.0)) if loss_count else 0,
+            'win_rate': win_count / total * 100,
         }
 
         # 计算盈亏比
@@ -387,49 +673,43 @@ class TradeAnalytics:
         else:
             stats['profit_factor'] = 0
 
-        # 计算分布桶
-        if trades:
-            min_pnl = min(trades)
-            max_pnl = max(trades)
-            range_pnl = max_pnl - min_pnl
-
-            if range_pnl > 0:
-                bucket_size = range_pnl / 10
-                buckets = []
-                for i in range(10):
-                    lower = min_pnl + i * bucket_size
-                    upper = min_pnl + (i + 1) * bucket_size
-                    count = len([t for t in trades if lower <= t < upper])
-                    buckets.append({
-                        'range': f'{lower:.0f} ~ {upper:.0f}',
-                        'lower': lower,
-                        'upper': upper,
-                        'count': count,
-                        'percent': count / total * 100 if total > 0 else 0
-                    })
-            else:
-                buckets = [{'range': f'{min_pnl:.0f}', 'count': total, 'percent': 100}]
-        else:
+        # 计算分布桶（10等分，一次直方图统计）
+        min_pnl = float(trades.min())
+        max_pnl = float(trades.max())
+        if max_pnl > min_pnl:
+            counts, edges = np.histogram(trades, bins=10, range=(min_pnl, max_pnl))
             buckets = []
+            for count, lower, upper in zip(counts.tolist(), edges[:-1].tolist(), edges[1:].tolist()):
+                buckets.append({
+                    'range': f'{lower:.0f} ~ {upper:.0f}',
+                    'lower': lower,
+                    'upper': upper,
+                    'count': count,
+                    'percent': count / total * 100
+                })
+        else:
+            buckets = [{'range': f'{min_pnl:.0f}', 'count': total, 'percent': 100}]
 
         return {'buckets': buckets, 'stats': stats}
 
     # ==================== 月度分析 ====================
 
-    def analyze_by_month(self):
+    def analyze_by_month(self, rows=None):
         """按月分析交易表现"""
-        qs = self.get_base_queryset()
-
-        monthly_stats = qs.annotate(
-            month=TruncMonth('trade_time')
-        ).values('month').annotate(
-            total_trades=Count('id'),
-            win_trades=Count('id', filter=Q(profit_loss__gt=0)),
-            loss_trades=Count('id', filter=Q(profit_loss__lt=0)),
-            total_pnl=Sum('profit_loss'),
-            avg_pnl=Avg('profit_loss'),
-            total_commission=Sum('commission'),
-        ).order_by('-month')
+        rows = self._rows_or_empty(rows)
+        if rows is not None:
+            monthly_stats = sorted(
+                _group_rows(rows, lambda r: (timezone.localtime(r.trade_time).date().replace(day=1),),
+                            ('month',)),
+                key=lambda x: x['month'], reverse=True
+            )
+        else:
+            monthly_stats = self.get_daily_stat_queryset().values(
+                month=TruncMonth('trade_date')
+            ).annotate(
+                **self._daily_stat_aggregates(),
+                total_commission=Sum('commission'),
+            ).order_by('-month')
 
         results = []
         for stat in monthly_stats:
@@ -442,42 +722,50 @@ class TradeAnalytics:
                 'win_trades': wins,
                 'loss_trades': stat['loss_trades'] or 0,
                 'win_rate': round(win_rate, 2),
-                'total_pnl': float(stat['total_pnl'] or 0),
-                'avg_pnl': float(stat['avg_pnl'] or 0),
+                'total_pnl': _f(stat['total_pnl']),
+                'avg_pnl': _f(stat['avg_pnl']),
                 'net_pnl': float((stat['total_pnl'] or 0) - (stat['total_commission'] or 0)),
             })
         return results
 
     # ==================== 综合摘要 ====================
 
-    def get_summary(self):
-        """获取综合分析摘要"""
-        qs = self.get_base_queryset()
+    def get_summary(self, rows=None, by_symbol=None, by_hour=None, streaks=None):
+        """获取综合分析摘要
 
+        Args:
+            rows: 可选，_load_rows() 预加载的成交记录
+            by_symbol / by_hour / streaks: 可选，已计算好的分析结果，传入时直接复用
+        """
         # 基础统计
-        basic_stats = qs.aggregate(
-            total_trades=Count('id'),
-            win_trades=Count('id', filter=Q(profit_loss__gt=0)),
-            loss_trades=Count('id', filter=Q(profit_loss__lt=0)),
-            total_pnl=Sum('profit_loss'),
-            avg_pnl=Avg('profit_loss'),
-            total_commission=Sum('commission'),
-            max_profit=Max('profit_loss', filter=Q(profit_loss__gt=0)),
-            max_loss=Min('profit_loss', filter=Q(profit_loss__lt=0)),
-            total_quantity=Sum('quantity'),
-        )
+        rows = self._rows_or_empty(rows)
+        if rows is not None:
+            basic_stats = _GroupStats()
+            for row in rows:
+                basic_stats.add(row)
+            basic_stats = basic_stats.as_stat()
+        else:
+            basic_stats = self.get_base_queryset().aggregate(
+                total_trades=Count('id'),
+                win_trades=Count('id', filter=Q(profit_loss__gt=0)),
+                loss_trades=Count('id', filter=Q(profit_loss__lt=0)),
+                total_pnl=Sum('profit_loss'),
+                avg_pnl=Avg('profit_loss'),
+                total_commission=Sum('commission'),
+                max_profit=Max('profit_loss', filter=Q(profit_loss__gt=0)),
+                max_loss=Min('profit_loss', filter=Q(profit_loss__lt=0)),
+                avg_win=Avg('profit_loss', filter=Q(profit_loss__gt=0)),
+                avg_loss=Avg('profit_loss', filter=Q(profit_loss__lt=0)),
+                total_quantity=Sum('quantity'),
+            )
 
         total = basic_stats['total_trades'] or 0
         wins = basic_stats['win_trades'] or 0
         losses = basic_stats['loss_trades'] or 0
 
-        # 计算平均盈利和平均亏损
-        avg_win = 0
-        avg_loss = 0
-        if wins > 0:
-            avg_win = qs.filter(profit_loss__gt=0).aggregate(avg=Avg('profit_loss'))['avg'] or 0
-        if losses > 0:
-            avg_loss = abs(qs.filter(profit_loss__lt=0).aggregate(avg=Avg('profit_loss'))['avg'] or 0)
+        # 平均盈利和平均亏损
+        avg_win = basic_stats['avg_win'] or 0
+        avg_loss = abs(basic_stats['avg_loss'] or 0)
 
         # 盈亏比
         profit_factor = (float(avg_win) / float(avg_loss)) if avg_loss > 0 else 0
@@ -487,17 +775,26 @@ class TradeAnalytics:
         expectancy = (win_rate * float(avg_win)) - ((1 - win_rate) * float(avg_loss))
 
         # 最佳/最差品种
-        symbol_analysis = self.analyze_by_symbol()
-        best_symbol = symbol_analysis[0] if symbol_analysis else None
-        worst_symbol = symbol_analysis[-1] if len(symbol_analysis) > 1 else None
+        if by_symbol is None and rows is not None:
+            by_symbol = self.analyze_by_symbol(rows)
+        if by_symbol is not None:
+            best_symbol = by_symbol[0] if by_symbol else None
+            worst_symbol = by_symbol[-1] if len(by_symbol) > 1 else None
+        else:
+            best_symbol, worst_symbol = self._best_worst_symbol()
 
         # 最佳/最差时段
-        hour_analysis = self.analyze_by_hour()
-        best_hour = max(hour_analysis, key=lambda x: x['total_pnl']) if hour_analysis else None
-        worst_hour = min(hour_analysis, key=lambda x: x['total_pnl']) if hour_analysis else None
+        if by_hour is None and rows is not None:
+            by_hour = self.analyze_by_hour(rows)
+        if by_hour is not None:
+            best_hour = max(by_hour, key=lambda x: x['total_pnl']) if by_hour else None
+            worst_hour = min(by_hour, key=lambda x: x['total_pnl']) if by_hour else None
+        else:
+            best_hour, worst_hour = self._best_worst_hour()
 
         # 连续统计
-        streaks = self.analyze_streaks()
+        if streaks is None:
+            streaks = self.analyze_streaks(rows)
 
         return {
             'basic': {
@@ -506,12 +803,12 @@ class TradeAnalytics:
                 'loss_trades': losses,
                 'even_trades': total - wins - losses,
                 'win_rate': round(wins / total * 100 if total > 0 else 0, 2),
-                'total_pnl': float(basic_stats['total_pnl'] or 0),
-                'avg_pnl': float(basic_stats['avg_pnl'] or 0),
-                'total_commission': float(basic_stats['total_commission'] or 0),
+                'total_pnl': _f(basic_stats['total_pnl']),
+                'avg_pnl': _f(basic_stats['avg_pnl']),
+                'total_commission': _f(basic_stats['total_commission']),
                 'net_pnl': float((basic_stats['total_pnl'] or 0) - (basic_stats['total_commission'] or 0)),
-                'max_profit': float(basic_stats['max_profit'] or 0),
-                'max_loss': float(basic_stats['max_loss'] or 0),
+                'max_profit': _f(basic_stats['max_profit']),
+                'max_loss': _f(basic_stats['max_loss']),
             },
             'ratios': {
                 'avg_win': float(avg_win),
@@ -526,19 +823,89 @@ class TradeAnalytics:
             'streaks': streaks,
         }
 
+    def _best_worst_symbol(self):
+        """最佳/最差标的：先按标的只汇总盈亏排名，再只对这两个标的取完整统计"""
+        ranking = self.get_daily_stat_queryset().values('symbol_id').annotate(total_pnl=Sum('profit_loss'))
+        best = ranking.order_by('-total_pnl').first()
+        if best is None:
+            return None, None
+        # 取两行：盈亏全部相同时最低一行可能就是 best，需要换下一行
+        worst = next(
+            (row for row in ranking.order_by('total_pnl')[:2] if row['symbol_id'] != best['symbol_id']),
+            None
+        )
+        symbol_ids = [best['symbol_id']] + ([worst['symbol_id']] if worst else [])
+        stats = {
+            stat['symbol_id']: stat
+            for stat in self._with_symbol_info(self._symbol_stats_queryset().filter(symbol_id__in=symbol_ids))
+        }
+        return (
+            self._format_symbol_stat(stats[best['symbol_id']]),
+            self._format_symbol_stat(stats[worst['symbol_id']]) if worst else None,
+        )
+
+    def _best_worst_hour(self):
+        """只取盈亏最高/最低的时段，不拉取完整的时段统计"""
+        stats = self._hour_stats_queryset()
+        best = stats.order_by('-total_pnl', 'hour').first()
+        if best is None:
+            return None, None
+        worst = stats.order_by('total_pnl', 'hour').first()
+        return self._format_hour_stat(best), self._format_hour_stat(worst)
+
     # ==================== 完整报告 ====================
 
     def get_full_report(self):
-        """获取完整分析报告"""
+        """获取完整分析报告（带缓存，交易变更时由信号失效；缓存不可用时直接计算）"""
+        version = get_report_version(self.user.pk)
+        if version is None:
+            return self._build_full_report()
+
+        cache_key = 'trade_analytics:report:{}:{}:{}:{}:{}'.format(
+            self.user.pk,
+            self.account.pk if self.account else 'all',
+            self.start_date,
+            self.end_date,
+            version,
+        )
+        try:
+            report = cache.get(cache_key)
+        except Exception as e:
+            logger.warning(f'读取分析报告缓存失败: {e}')
+            return self._build_full_report()
+        if report is None:
+            report = self._build_full_report()
+            if self.end_date < timezone.localdate():
+                timeout = REPORT_CACHE_TIMEOUT_PAST
+            else:
+                timeout = REPORT_CACHE_TIMEOUT
+            try:
+                cache.set(cache_key, report, timeout)
+            except Exception as e:
+                logger.warning(f'写入分析报告缓存失败: {e}')
+        return report
+
+    def _build_full_report(self):
+        """计算完整分析报告
+
+        成交记录只查询一次，各维度统计在内存中基于同一份数据计算
+        （时段、星期、方向、标的类型等维度共用这一次扫描，相当于 GROUPING SETS）。
+        之后的分析均为纯 Python 计算，不再访问数据库，串行执行即可
+        （线程池受 GIL 限制无法加速，反而增加数据库连接）。
+        """
+        rows = self._load_rows()
+        by_hour = self.analyze_by_hour(rows)
+        by_symbol = self.analyze_by_symbol(rows)
+        streaks = self.analyze_streaks(rows)
         return {
-            'summary': self.get_summary(),
-            'by_hour': self.analyze_by_hour(),
-            'by_weekday': self.analyze_by_weekday(),
-            'by_symbol': self.analyze_by_symbol(),
-            'by_symbol_type': self.analyze_by_symbol_type(),
-            'by_strategy': self.analyze_by_strategy(),
-            'by_side': self.analyze_by_side(),
-            'by_month': self.analyze_by_month(),
-            'pnl_distribution': self.analyze_pnl_distribution(),
-            'streaks': self.analyze_streaks(),
+            'summary': self.get_summary(rows, by_symbol=by_symbol, by_hour=by_hour, streaks=streaks),
+            'by_hour': by_hour,
+            'by_weekday': self.analyze_by_weekday(rows),
+            'by_symbol': by_symbol,
+            'by_symbol_type': self.analyze_by_symbol_type(rows),
+            'by_strategy': self.analyze_by_strategy(rows),
+            'by_side': self.analyze_by_side(rows),
+            'by_month': self.analyze_by_month(rows),
+            'pnl_distribution': self.analyze_pnl_distribution(rows),
+            'streaks': streaks,
         }
@@ -3,14 +3,83 @@
 提供报表生成、风险检查、价格监控等自动化功能
 """
 from django.utils import timezone
-from django.db.models import Sum, Count, Avg, F, Q
+from django.db.models import (Sum, Count, Max, Min, F, Q, OuterRef, Subquery, Case, When, Value,
+                              DecimalField)
+from django.db.models.functions import Coalesce
 from django.db import transaction
 from datetime import timedelta, date
 from decimal import Decimal
+from functools import lru_cache
 import logging
 
+import numpy as np
+
 logger = logging.getLogger(__name__)
 
+# 策略绩效批量更新时写回的字段
+METRICS_STAT_FIELDS = [
+    'total_trades', 'profitable_trades', 'losing_trades', 'win_rate',
+    'total_profit', 'total_loss', 'profit_factor', 'average_profit', 'average_loss',
+    'largest_profit', 'largest_loss', 'total_return',
+]
+
+# 风险警告消息模板：规则类型 -> (格式串, 取值转换)，只格式化命中的那一条
+ALERT_MESSAGE_TEMPLATES = {
+    'daily_loss_limit': ('今日亏损 ¥{cv:.2f} 已超过限额 ¥{th:.2f}', None),
+    'single_trade_loss': ('单笔亏损 ¥{cv:.2f} 已超过限额 ¥{th:.2f}', None),
+    'max_drawdown': ('当前回撤 ¥{cv:.2f} 已超过限额 ¥{th:.2f}', None),
+    'max_position_ratio': ('当前仓位 {cv:.1f}% 已超过限额 {th:.1f}%', None),
+    'consecutive_losses': ('已连续亏损 {cv} 次，超过限额 {th} 次', int),
+    'daily_trade_limit': ('今日交易 {cv} 次，已超过限额 {th} 次', int),
+}
+
+
+def active_accounts():
+    """获取全部活跃账户（连同所有者），同一轮任务的各步骤可共用此列表
+
+    只加载报表、快照和规则检查用到的字段。
+    """
+    from .models import Account
+    return list(
+        Account.objects.filter(status='active').select_related('owner').only(
+            'id', 'name', 'initial_balance', 'current_balance', 'owner'
+        )
+    )
+
+
+def _percent(numerator, denominator):
+    """百分比（胜率、盈亏比例、回撤比例等）
+
+    比例字段只保留两位小数，用 float 计算后保留 4 位再转回 Decimal，
+    避免逐个账户做高精度 Decimal 除法；分母不为正时返回 0。
+    """
+    if not denominator or denominator <= 0:
+        return Decimal('0')
+    return Decimal(str(round(float(numerator) * 100.0 / float(denominator), 4)))
+
+
+@lru_cache(maxsize=None)
+def _rule_type_display(rule_type):
+    """规则类型显示名（选项固定，按类型缓存）"""
+    from .models import RiskRule
+    return dict(RiskRule.RULE_TYPE_CHOICES).get(rule_type, rule_type)
+
+
+def _dispatch_notifications(task, ids):
+    """事务提交后把通知发送交给 Celery 队列；无法入队时同步发送"""
+    if not ids:
+        return
+
+    def enqueue():
+        try:
+            # 不重试连接，broker 不可用时立即回退
+            task.apply_async((ids,), retry=False)
+        except Exception as e:
+            logger.warning(f"Failed to enqueue {task.name}, sending synchronously: {e}")
+            task(ids)
+
+    transaction.on_commit(enqueue)
+
 
 class ReportGenerator:
     """报表自动生成器"""
@@ -19,103 +88,133 @@ class ReportGenerator:
         self.account = account
         # 延迟导入避免循环引用
         from .models import (
-            Account, TradeLog, DailyReport, MonthlyReport,
+            Account, AccountTransaction, TradeLog, DailyReport, MonthlyReport,
             Position, RiskSnapshot
         )
         self.Account = Account
+        self.AccountTransaction = AccountTransaction
         self.TradeLog = TradeLog
         self.DailyReport = DailyReport
         self.MonthlyReport = MonthlyReport
         self.Position = Position
         self.RiskSnapshot = RiskSnapshot
 
-    def generate_daily_report(self, report_date=None, account=None):
-        """生成每日报表"""
+    def generate_daily_report(self, report_date=None, account=None, accounts=None):
+        """生成每日报表
+
+        未指定账户时为 accounts（默认全部活跃账户）批量生成。
+        """
         if report_date is None:
             report_date = timezone.now().date() - timedelta(days=1)  # 默认生成昨天的
 
         account = account or self.account
         if account is None:
-            # 为所有活跃账户生成
-            accounts = self.Account.objects.filter(status='active')
-            results = []
-            for acc in accounts:
-                result = self._generate_daily_for_account(acc, report_date)
-                if result:
-                    results.append(result)
-            return results
+            # 为所有活跃账户批量生成
+            if accounts is None:
+                accounts = active_accounts()
+            return [report for report in self._generate_daily_reports(accounts, report_date) if report]
         else:
-            return self._generate_daily_for_account(account, report_date)
+            return self._generate_daily_reports([account], report_date)[0]
 
-    def _generate_daily_for_account(self, account, report_date):
-        """为单个账户生成每日报表"""
-        # 检查是否已存在
-        existing = self.DailyReport.objects.filter(
-            account=account,
-            report_date=report_date
-        ).first()
-        if existing:
-            logger.info(f"Daily report already exists for {account.name} on {report_date}")
-            return existing
+    def _generate_daily_reports(self, accounts, report_date):
+        """为一组账户生成每日报表
 
-        # 获取当日交易
-        day_start = timezone.make_aware(
-            timezone.datetime.combine(report_date, timezone.datetime.min.time())
-        )
-        day_end = timezone.make_aware(
-            timezone.datetime.combine(report_date, timezone.datetime.max.time())
-        )
-
-        trades = self.TradeLog.objects.filter(
-            account=account,
-            trade_time__range=(day_start, day_end),
-            status='filled'
-        )
-
-        # 计算统计数据
-        trade_count = trades.count()
-        if trade_count == 0:
-            logger.info(f"No trades for {account.name} on {report_date}")
-            return None
-
-        profit_loss = trades.aggregate(total=Sum('profit_loss'))['total'] or Decimal('0')
-        commission = trades.aggregate(total=Sum('commission'))['total'] or Decimal('0')
-        win_trades = trades.filter(profit_loss__gt=0)
-        loss_trades = trades.filter(profit_loss__lt=0)
-        win_count = win_trades.count()
-        loss_count = loss_trades.count()
-
-        # 获取前一天的报表以计算期初余额
-        prev_report = self.DailyReport.objects.filter(
-            account=account,
-            report_date__lt=report_date
-        ).order_by('-report_date').first()
-
-        if prev_report:
-            starting_balance = prev_report.ending_balance
-        else:
-            starting_balance = account.initial_balance
+        每一步都按账户分组批量查询，新报表统一 bulk_create；
+        返回与 accounts 一一对应的报表列表，无交易的账户为 None。
+        """
+        results = {}
 
-        # 计算净入金（当日入金-出金）
-        from .models import AccountTransaction
-        net_deposit = AccountTransaction.objects.filter(
-            account=account,
-            transaction_time__range=(day_start, day_end),
-            transaction_type__in=['deposit', 'withdraw']
-        ).aggregate(total=Sum('amount'))['total'] or Decimal('0')
+        # 检查是否已存在
+        existing = {
+            r.account_id: r
+            for r in self.DailyReport.objects.filter(
+                account__in=[acc.id for acc in accounts],
+                report_date=report_date
+            )
+        }
+        for acc in accounts:
+            if acc.id in existing:
+                logger.info(f"Daily report already exists for {acc.name} on {report_date}")
+                results[acc.id] = existing[acc.id]
+        pending = [acc for acc in accounts if acc.id not in existing]
+
+        # 计算统计数据（按账户一次条件聚合）
+        trade_stats = {}
+        if pending:
+            trade_stats = {
+                row['account']: row
+                for row in self.TradeLog.objects.filter(
+                    account__in=[acc.id for acc in pending],
+                    trade_time__date=report_date,
+                    status='filled'
+                ).values('account').annotate(
+                    cnt=Count('id'),
+                    pnl=Sum('profit_loss'),
+                    comm=Sum('commission'),
+                    wins=Count('id', filter=Q(profit_loss__gt=0)),
+                    losses=Count('id', filter=Q(profit_loss__lt=0)),
+                ).order_by()
+            }
+        for acc in pending:
+            if acc.id not in trade_stats:
+                logger.info(f"No trades for {acc.name} on {report_date}")
+        pending = [acc for acc in pending if acc.id in trade_stats]
+
+        new_reports = []
+        if pending:
+            pending_ids = [acc.id for acc in pending]
+
+            # 期初余额（前一份报表的期末余额，没有则取初始资金）和当日净入金（入金-出金）
+            # 都由数据库在同一条查询里算出
+            prev_ending = self.DailyReport.objects.filter(
+                account=OuterRef('pk'),
+                report_date__lt=report_date
+            ).order_by('-report_date').values('ending_balance')[:1]
+            day_deposit = self.AccountTransaction.objects.filter(
+                account=OuterRef('pk'),
+                transaction_time__date=report_date,
+                transaction_type__in=['deposit', 'withdraw']
+            ).order_by().values('account').annotate(total=Sum('amount')).values('total')
+            balances = {
+                row[0]: row[1:]
+                for row in self.Account.objects.filter(id__in=pending_ids).annotate(
+                    opening=Coalesce(Subquery(prev_ending), F('initial_balance')),
+                    deposit=Coalesce(Subquery(day_deposit), Value(Decimal('0')), output_field=DecimalField()),
+                ).values_list('id', 'opening', 'deposit')
+            }
+
+            for acc in pending:
+                starting_balance, net_deposit = balances[acc.id]
+                report = self._build_daily_report(
+                    acc, report_date, trade_stats[acc.id], starting_balance, net_deposit
+                )
+                new_reports.append(report)
+                results[acc.id] = report
+
+            # 创建报表（报表没有依赖的 post_save 信号，bulk_create 在单个事务中完成）
+            self.DailyReport.objects.bulk_create(new_reports)
+            for report in new_reports:
+                logger.info(f"Generated daily report for {report.account.name} on {report_date}: PnL={report.profit_loss}")
+
+        return [results.get(acc.id) for acc in accounts]
+
+    def _build_daily_report(self, account, report_date, stats, starting_balance, net_deposit):
+        """根据当日统计构造每日报表（不保存）"""
+        trade_count = stats['cnt']
+        profit_loss = stats['pnl'] or Decimal('0')
+        commission = stats['comm'] or Decimal('0')
+        win_count = stats['wins']
+        loss_count = stats['losses']
 
         ending_balance = starting_balance + profit_loss - commission + net_deposit
 
         # 胜率
-        win_rate = Decimal(win_count / trade_count * 100) if trade_count > 0 else Decimal('0')
+        win_rate = _percent(win_count, trade_count)
 
         # 盈亏比例
-        profit_loss_ratio = Decimal('0')
-        if starting_balance > 0:
-            profit_loss_ratio = (profit_loss / starting_balance) * 100
+        profit_loss_ratio = _percent(profit_loss, starting_balance)
 
-        # 创建报表
-        report = self.DailyReport.objects.create(
+        return self.DailyReport(
             account=account,
             report_date=report_date,
             starting_balance=starting_balance,
@@ -130,10 +229,7 @@ class ReportGenerator:
             commission=commission
         )
 
-        logger.info(f"Generated daily report for {account.name} on {report_date}: PnL={profit_loss}")
-        return report
-
-    def generate_monthly_report(self, year=None, month=None, account=None):
+    def generate_monthly_report(self, year=None, month=None, account=None, accounts=None):
         """生成月度报表"""
         now = timezone.now()
         if year is None or month is None:
@@ -147,12 +243,15 @@ class ReportGenerator:
 
         account = account or self.account
         if account is None:
-            accounts = self.Account.objects.filter(status='active')
+            if accounts is None:
+                accounts = active_accounts()
             results = []
-            for acc in accounts:
-                result = self._generate_monthly_for_account(acc, year, month)
-                if result:
-                    results.append(result)
+            # 所有账户的月报在一个事务中写入，只提交一次
+            with transaction.atomic():
+                for acc in accounts:
+                    result = self._generate_monthly_for_account(acc, year, month)
+                    if result:
+                        results.append(result)
             return results
         else:
             return self._generate_monthly_for_account(account, year, month)
@@ -176,25 +275,26 @@ class ReportGenerator:
             report_date__month=month
         ).order_by('report_date')
 
-        if not daily_reports.exists():
+        # 一个月最多 31 行，一次取出后在 Python 中汇总
+        daily = list(daily_reports.only(
+            'report_date', 'starting_balance', 'ending_balance',
+            'profit_loss', 'net_deposit', 'max_drawdown'
+        ))
+        if not daily:
             logger.info(f"No daily reports for {account.name} on {year}-{month}")
             return None
 
         # 汇总数据
-        first_report = daily_reports.first()
-        last_report = daily_reports.last()
+        first_report, last_report = daily[0], daily[-1]
 
         starting_balance = first_report.starting_balance
         ending_balance = last_report.ending_balance
 
-        aggregated = daily_reports.aggregate(
-            total_pnl=Sum('profit_loss'),
-            total_deposit=Sum('net_deposit'),
-            max_dd=Avg('max_drawdown')  # 简化处理
-        )
-
-        profit_loss = aggregated['total_pnl'] or Decimal('0')
-        net_deposit = aggregated['total_deposit'] or Decimal('0')
+        profit_loss = sum((d.profit_loss or Decimal('0') for d in daily), Decimal('0'))
+        net_deposit = sum((d.net_deposit or Decimal('0') for d in daily), Decimal('0'))
+        # 简化处理：取每日最大回撤的平均值
+        drawdowns = [d.max_drawdown for d in daily if d.max_drawdown is not None]
+        max_drawdown = sum(drawdowns, Decimal('0')) / len(drawdowns) if drawdowns else Decimal('0')
 
         # 直接从交易记录计算月度胜率（更准确）
         from datetime import date
@@ -204,20 +304,21 @@ class ReportGenerator:
         else:
             month_end = date(year, month + 1, 1)
 
-        month_trades = self.TradeLog.objects.filter(
+        month_stats = self.TradeLog.objects.filter(
             account=account,
             status='filled',
             trade_time__date__gte=month_start,
             trade_time__date__lt=month_end
+        ).aggregate(
+            cnt=Count('id'),
+            wins=Count('id', filter=Q(profit_loss__gt=0)),
         )
-        trade_count = month_trades.count()
-        win_count = month_trades.filter(profit_loss__gt=0).count()
+        trade_count = month_stats['cnt']
+        win_count = month_stats['wins']
 
         # 胜率和盈亏比例
-        win_rate = Decimal(win_count / trade_count * 100) if trade_count > 0 else Decimal('0')
-        profit_loss_ratio = Decimal('0')
-        if starting_balance > 0:
-            profit_loss_ratio = (profit_loss / starting_balance) * 100
+        win_rate = _percent(win_count, trade_count)
+        profit_loss_ratio = _percent(profit_loss, starting_balance)
 
         # 创建月度报表
         report = self.MonthlyReport.objects.create(
@@ -231,7 +332,7 @@ class ReportGenerator:
             profit_loss_ratio=profit_loss_ratio,
             trade_count=trade_count,
             win_rate=win_rate,
-            max_drawdown=aggregated['max_dd'] or Decimal('0')
+            max_drawdown=max_drawdown
         )
 
         logger.info(f"Generated monthly report for {account.name} on {year}-{month}: PnL={profit_loss}")
@@ -254,13 +355,16 @@ class RiskMonitor:
         self.TradeLog = TradeLog
         self.Position = Position
         self.NotificationService = NotificationService
+        self._threshold_cache = {}
 
-    def check_all_rules(self, account=None):
+    def check_all_rules(self, account=None, accounts=None):
         """检查所有风险规则"""
+        # 阈值只在本轮检查内复用
+        self._threshold_cache = {}
         if account:
             accounts = [account]
-        else:
-            accounts = self.Account.objects.filter(status='active')
+        elif accounts is None:
+            accounts = active_accounts()
 
         alerts = []
         for acc in accounts:
@@ -271,25 +375,84 @@ class RiskMonitor:
 
     def _check_account_rules(self, account):
         """检查单个账户的风险规则"""
-        rules = self.RiskRule.objects.filter(account=account, is_active=True)
+        rules = list(self.RiskRule.objects.filter(account=account, is_active=True).only(
+            'id', 'rule_type', 'threshold_percent', 'threshold_value', 'level'
+        ))
+        if not rules:
+            return []
+
+        # 最近一小时已有活跃警告的规则直接跳过（避免重复警告），不再计算其当前值
+        recent_rule_ids = self._recent_alert_rule_ids(account)
+        rules = [rule for rule in rules if rule.id not in recent_rule_ids]
+        if not rules:
+            return []
+
+        # 各规则共用的当前值按账户只查询一次
+        ctx = self._build_rule_context(account, {rule.rule_type for rule in rules})
         alerts = []
 
         for rule in rules:
-            alert = self._check_rule(rule, account)
+            alert = self._check_rule(rule, account, ctx, recent_rule_ids)
             if alert:
                 alerts.append(alert)
-                # 发送通知
-                try:
-                    service = self.NotificationService(account.owner)
-                    service.notify_risk_warning(alert)
-                except Exception as e:
-                    logger.error(f"Failed to send risk notification: {e}")
 
+        # 通知由 Celery 异步发送，不阻塞后续检查
+        from .tasks import send_risk_notifications
+        _dispatch_notifications(send_risk_notifications, [alert.id for alert in alerts])
         return alerts
 
-    def _check_rule(self, rule, account):
+    def _build_rule_context(self, account, rule_types):
+        """预先计算规则检查所需的账户数据，只查询给定规则类型用得到的部分"""
+        today = timezone.now().date()
+        ctx = {}
+
+        if rule_types & {'daily_loss_limit', 'daily_trade_limit'}:
+            # 今日盈亏只统计已成交，今日交易次数统计全部状态
+            today_stats = self.TradeLog.objects.filter(
+                account=account,
+                trade_time__date__gte=today
+            ).aggregate(
+                pnl=Sum('profit_loss', filter=Q(status='filled')),
+                cnt=Count('id'),
+            )
+            ctx['today_pnl'] = today_stats['pnl'] or Decimal('0')
+            ctx['today_trade_count'] = today_stats['cnt']
+
+        if 'single_trade_loss' in rule_types:
+            ctx['last_trade_pnl'] = self.TradeLog.objects.filter(
+                account=account,
+                status='filled'
+            ).order_by('-trade_time').values_list('profit_loss', flat=True).first()
+
+        if rule_types & {'max_drawdown', 'consecutive_losses'}:
+            ctx['latest_snapshot'] = self.RiskSnapshot.objects.filter(
+                account=account
+            ).order_by('-snapshot_date').first()
+
+        if 'max_position_ratio' in rule_types:
+            ctx['total_position_value'] = self.Position.objects.filter(
+                account=account
+            ).aggregate(total=Sum('market_value'))['total'] or Decimal('0')
+
+        return ctx
+
+    def _recent_alert_rule_ids(self, account):
+        """最近一小时内已触发且仍活跃的警告对应的规则ID"""
+        return set(self.RiskAlert.objects.filter(
+            account=account,
+            status='active',
+            triggered_at__gte=timezone.now() - timedelta(hours=1)
+        ).values_list('rule_id', flat=True))
+
+    def _check_rule(self, rule, account, ctx=None, recent_rule_ids=None):
         """检查单条规则"""
-        current_value = self._get_current_value(rule, account)
+        # 检查是否最近已经触发过（避免重复警告），在计算当前值之前短路
+        if recent_rule_ids is None:
+            recent_rule_ids = self._recent_alert_rule_ids(account)
+        if rule.id in recent_rule_ids:
+            return None
+
+        current_value = self._get_current_value(rule, account, ctx)
         threshold = self._get_threshold(rule, account)
 
         if current_value is None or threshold is None:
@@ -307,24 +470,13 @@ class RiskMonitor:
         if not triggered:
             return None
 
-        # 检查是否最近已经触发过（避免重复警告）
-        recent_alert = self.RiskAlert.objects.filter(
-            account=account,
-            rule=rule,
-            status='active',
-            triggered_at__gte=timezone.now() - timedelta(hours=1)
-        ).exists()
-
-        if recent_alert:
-            return None
-
         # 创建警告
         alert = self.RiskAlert.objects.create(
             account=account,
             rule=rule,
             alert_type=rule.rule_type,
             level=rule.level,
-            title=f'{rule.get_rule_type_display()}警告',
+            title=f'{_rule_type_display(rule.rule_type)}警告',
             message=self._generate_alert_message(rule, current_value, threshold),
             current_value=current_value,
             threshold_value=threshold
@@ -333,67 +485,47 @@ class RiskMonitor:
         logger.warning(f"Risk alert triggered: {alert.title} for {account.name}")
         return alert
 
-    def _get_current_value(self, rule, account):
+    def _get_current_value(self, rule, account, ctx=None):
         """获取规则对应的当前值"""
-        today = timezone.now().date()
-        today_start = timezone.make_aware(
-            timezone.datetime.combine(today, timezone.datetime.min.time())
-        )
+        if ctx is None:
+            ctx = self._build_rule_context(account, {rule.rule_type})
 
         if rule.rule_type == 'daily_loss_limit':
             # 今日亏损
-            pnl = self.TradeLog.objects.filter(
-                account=account,
-                trade_time__gte=today_start,
-                status='filled'
-            ).aggregate(total=Sum('profit_loss'))['total'] or Decimal('0')
+            pnl = ctx['today_pnl']
             return abs(pnl) if pnl < 0 else Decimal('0')
 
         elif rule.rule_type == 'single_trade_loss':
             # 最近一笔交易亏损
-            last_trade = self.TradeLog.objects.filter(
-                account=account,
-                status='filled'
-            ).order_by('-trade_time').first()
-            if last_trade and last_trade.profit_loss < 0:
-                return abs(last_trade.profit_loss)
+            last_pnl = ctx['last_trade_pnl']
+            if last_pnl is not None and last_pnl < 0:
+                return abs(last_pnl)
             return Decimal('0')
 
         elif rule.rule_type == 'max_drawdown':
             # 当前回撤
-            snapshot = self.RiskSnapshot.objects.filter(
-                account=account
-            ).order_by('-snapshot_date').first()
+            snapshot = ctx['latest_snapshot']
             if snapshot:
                 return snapshot.current_drawdown
             return Decimal('0')
 
         elif rule.rule_type == 'max_position_ratio':
             # 当前仓位比例
-            positions = self.Position.objects.filter(account=account)
-            total_position = positions.aggregate(
-                total=Sum('market_value')
-            )['total'] or Decimal('0')
+            total_position = ctx['total_position_value']
             if account.current_balance > 0:
                 return (total_position / account.current_balance) * 100
             return Decimal('0')
 
         elif rule.rule_type == 'consecutive_losses':
             # 连续亏损次数
-            snapshot = self.RiskSnapshot.objects.filter(
-                account=account
-            ).order_by('-snapshot_date').first()
+            snapshot = ctx['latest_snapshot']
             if snapshot:
                 return Decimal(str(snapshot.consecutive_losses))
             return Decimal('0')
 
         elif rule.rule_type == 'daily_trade_limit':
             # 今日交易次数
-            count = self.TradeLog.objects.filter(
-                account=account,
-                trade_time__gte=today_start
-            ).count()
-            return Decimal(str(count))
+            return Decimal(str(ctx['today_trade_count']))
 
         return None
 
@@ -401,75 +533,136 @@ class RiskMonitor:
         """获取规则阈值
         使用 initial_balance 作为计算基准，避免账户亏损时阈值变小
         """
+        key = (rule.id, account.id)
+        if key in self._threshold_cache:
+            return self._threshold_cache[key]
+
         if rule.threshold_percent and rule.rule_type in ['daily_loss_limit', 'single_trade_loss', 'max_drawdown']:
             # 按百分比计算阈值，使用初始余额作为基准
             base_balance = account.initial_balance if account.initial_balance > 0 else account.current_balance
-            return base_balance * rule.threshold_percent / 100
-        return rule.threshold_value
+            threshold = base_balance * rule.threshold_percent / 100
+        else:
+            threshold = rule.threshold_value
+        self._threshold_cache[key] = threshold
+        return threshold
 
     def _generate_alert_message(self, rule, current_value, threshold):
         """生成警告消息"""
-        messages = {
-            'daily_loss_limit': f'今日亏损 ¥{current_value:.2f} 已超过限额 ¥{threshold:.2f}',
-            'single_trade_loss': f'单笔亏损 ¥{current_value:.2f} 已超过限额 ¥{threshold:.2f}',
-            'max_drawdown': f'当前回撤 ¥{current_value:.2f} 已超过限额 ¥{threshold:.2f}',
-            'max_position_ratio': f'当前仓位 {current_value:.1f}% 已超过限额 {threshold:.1f}%',
-            'consecutive_losses': f'已连续亏损 {int(current_value)} 次，超过限额 {int(threshold)} 次',
-            'daily_trade_limit': f'今日交易 {int(current_value)} 次，已超过限额 {int(threshold)} 次',
-        }
-        return messages.get(rule.rule_type, f'当前值 {current_value} 超过阈值 {threshold}')
-
-    def update_risk_snapshot(self, account=None):
-        """更新风险快照"""
+        template = ALERT_MESSAGE_TEMPLATES.get(rule.rule_type)
+        if template is None:
+            return f'当前值 {current_value} 超过阈值 {threshold}'
+        fmt, convert = template
+        if convert:
+            current_value, threshold = convert(current_value), convert(threshold)
+        return fmt.format(cv=current_value, th=threshold)
+
+    def update_risk_snapshot(self, account=None, accounts=None):
+        """更新风险快照
+
+        各账户的统计数据按账户分组批量查询，在内存中计算后统一写回。
+        """
         if account:
             accounts = [account]
-        else:
-            accounts = self.Account.objects.filter(status='active')
-
-        snapshots = []
-        for acc in accounts:
-            snapshot = self._create_snapshot(acc)
-            if snapshot:
-                snapshots.append(snapshot)
-
-        return snapshots
+        elif accounts is None:
+            accounts = active_accounts()
+        if not accounts:
+            return []
 
-    def _create_snapshot(self, account):
-        """为账户创建风险快照"""
         today = timezone.now().date()
+        account_ids = [acc.id for acc in accounts]
+
+        # 今日交易统计
+        today_stats = {
+            row['account']: row
+            for row in self.TradeLog.objects.filter(
+                account__in=account_ids,
+                trade_time__date__gte=today,
+                status='filled'
+            ).values('account').annotate(
+                pnl=Sum('profit_loss'),
+                cnt=Count('id'),
+                wins=Count('id', filter=Q(profit_loss__gt=0)),
+                losses=Count('id', filter=Q(profit_loss__lt=0)),
+            ).order_by()
+        }
 
-        # 检查今天是否已有快照
-        existing = self.RiskSnapshot.objects.filter(
-            account=account,
-            snapshot_date=today
-        ).first()
-
-        today_start = timezone.make_aware(
-            timezone.datetime.combine(today, timezone.datetime.min.time())
+        # 持仓总值
+        position_values = dict(
+            self.Position.objects.filter(account__in=account_ids).values('account').annotate(
+                total=Sum('market_value')
+            ).order_by().values_list('account', 'total')
         )
 
-        # 获取今日交易统计
-        today_trades = self.TradeLog.objects.filter(
-            account=account,
-            trade_time__gte=today_start,
-            status='filled'
+        # 活跃警告数
+        alert_counts = dict(
+            self.RiskAlert.objects.filter(account__in=account_ids, status='active').values('account').annotate(
+                c=Count('id')
+            ).order_by().values_list('account', 'c')
         )
 
-        daily_pnl = today_trades.aggregate(total=Sum('profit_loss'))['total'] or Decimal('0')
-        daily_trade_count = today_trades.count()
-        daily_win_count = today_trades.filter(profit_loss__gt=0).count()
-        daily_loss_count = today_trades.filter(profit_loss__lt=0).count()
+        # 每个账户最近的一条快照（用于历史最高余额与连续统计）
+        latest_date = self.RiskSnapshot.objects.filter(
+            account=OuterRef('account')
+        ).order_by('-snapshot_date').values('snapshot_date')[:1]
+        prev_snapshots = {
+            s.account_id: s
+            for s in self.RiskSnapshot.objects.filter(
+                account__in=account_ids,
+                snapshot_date=Subquery(latest_date)
+            )
+        }
+
+        # 今天已有的快照
+        existing_today = {
+            s.account_id: s
+            for s in self.RiskSnapshot.objects.filter(account__in=account_ids, snapshot_date=today)
+        }
+
+        to_create = []
+        to_update = []
+        snapshots = []
+        for acc in accounts:
+            fields = self._compute_snapshot_fields(
+                acc,
+                today_stats.get(acc.id, {}),
+                prev_snapshots.get(acc.id),
+                position_values.get(acc.id) or Decimal('0'),
+                alert_counts.get(acc.id, 0),
+            )
+            snapshot = existing_today.get(acc.id)
+            if snapshot is None:
+                snapshot = self.RiskSnapshot(account=acc, snapshot_date=today, **fields)
+                to_create.append(snapshot)
+            else:
+                for name, value in fields.items():
+                    setattr(snapshot, name, value)
+                to_update.append(snapshot)
+            snapshot.calculate_risk_score()
+            snapshots.append(snapshot)
+
+        # 新建与更新在同一事务中提交（快照没有依赖的 post_save 信号）
+        with transaction.atomic():
+            if to_create:
+                self.RiskSnapshot.objects.bulk_create(to_create)
+            if to_update:
+                # bulk_update 不会触发 auto_now，手动更新时间戳
+                now = timezone.now()
+                for snapshot in to_update:
+                    snapshot.updated_at = now
+                self.RiskSnapshot.objects.bulk_update(to_update, [*fields, 'risk_score', 'updated_at'])
+
+        for acc, snapshot in zip(accounts, snapshots):
+            logger.info(f"Updated risk snapshot for {acc.name}: risk_score={snapshot.risk_score}")
+        return snapshots
+
+    def _compute_snapshot_fields(self, account, today_stats, prev_snapshot, total_position_value, active_alerts_count):
+        """根据当日交易统计与上一条快照计算风险快照字段，返回字段字典（不含风险评分）"""
+        daily_pnl = today_stats.get('pnl') or Decimal('0')
 
         # 计算盈亏百分比
-        daily_pnl_percent = Decimal('0')
-        if account.current_balance > 0:
-            daily_pnl_percent = (daily_pnl / account.current_balance) * 100
+        daily_pnl_percent = _percent(daily_pnl, account.current_balance)
 
         # 获取历史最高余额
-        prev_snapshot = self.RiskSnapshot.objects.filter(
-            account=account
-        ).order_by('-snapshot_date').first()
-
         if prev_snapshot:
             peak_balance = max(prev_snapshot.peak_balance, account.current_balance)
             # 连续统计
@@ -493,107 +686,107 @@ class RiskMonitor:
 
         # 计算当前回撤
         current_drawdown = peak_balance - account.current_balance
-        current_drawdown_percent = Decimal('0')
-        if peak_balance > 0:
-            current_drawdown_percent = (current_drawdown / peak_balance) * 100
+        current_drawdown_percent = _percent(current_drawdown, peak_balance)
 
         # 更新最大回撤
         if current_drawdown > max_drawdown:
             max_drawdown = current_drawdown
             max_drawdown_percent = current_drawdown_percent
 
-        # 计算持仓数据
-        positions = self.Position.objects.filter(account=account)
-        total_position_value = positions.aggregate(
-            total=Sum('market_value')
-        )['total'] or Decimal('0')
-
-        position_ratio = Decimal('0')
-        if account.current_balance > 0:
-            position_ratio = (total_position_value / account.current_balance) * 100
-
-        # 活跃警告数
-        active_alerts_count = self.RiskAlert.objects.filter(
-            account=account,
-            status='active'
-        ).count()
-
-        # 创建或更新快照
-        if existing:
-            snapshot = existing
-            snapshot.daily_pnl = daily_pnl
-            snapshot.daily_pnl_percent = daily_pnl_percent
-            snapshot.daily_trade_count = daily_trade_count
-            snapshot.daily_win_count = daily_win_count
-            snapshot.daily_loss_count = daily_loss_count
-            snapshot.consecutive_wins = consecutive_wins
-            snapshot.consecutive_losses = consecutive_losses
-            snapshot.peak_balance = peak_balance
-            snapshot.current_drawdown = current_drawdown
-            snapshot.current_drawdown_percent = current_drawdown_percent
-            snapshot.max_drawdown = max_drawdown
-            snapshot.max_drawdown_percent = max_drawdown_percent
-            snapshot.total_position_value = total_position_value
-            snapshot.position_ratio = position_ratio
-            snapshot.active_alerts_count = active_alerts_count
-            snapshot.calculate_risk_score()
-            snapshot.save()
-        else:
-            snapshot = self.RiskSnapshot.objects.create(
-                account=account,
-                snapshot_date=today,
-                daily_pnl=daily_pnl,
-                daily_pnl_percent=daily_pnl_percent,
-                daily_trade_count=daily_trade_count,
-                daily_win_count=daily_win_count,
-                daily_loss_count=daily_loss_count,
-                consecutive_wins=consecutive_wins,
-                consecutive_losses=consecutive_losses,
-                peak_balance=peak_balance,
-                current_drawdown=current_drawdown,
-                current_drawdown_percent=current_drawdown_percent,
-                max_drawdown=max_drawdown,
-                max_drawdown_percent=max_drawdown_percent,
-                total_position_value=total_position_value,
-                position_ratio=position_ratio,
-                active_alerts_count=active_alerts_count
-            )
-            snapshot.calculate_risk_score()
-            snapshot.save()
-
-        logger.info(f"Updated risk snapshot for {account.name}: risk_score={snapshot.risk_score}")
-        return snapshot
+        # 计算持仓比例
+        position_ratio = _percent(total_position_value, account.current_balance)
+
+        return {
+            'daily_pnl': daily_pnl,
+            'daily_pnl_percent': daily_pnl_percent,
+            'daily_trade_count': today_stats.get('cnt', 0),
+            'daily_win_count': today_stats.get('wins', 0),
+            'daily_loss_count': today_stats.get('losses', 0),
+            'consecutive_wins': consecutive_wins,
+            'consecutive_losses': consecutive_losses,
+            'peak_balance': peak_balance,
+            'current_drawdown': current_drawdown,
+            'current_drawdown_percent': current_drawdown_percent,
+            'max_drawdown': max_drawdown,
+            'max_drawdown_percent': max_drawdown_percent,
+            'total_position_value': total_position_value,
+            'position_ratio': position_ratio,
+            'active_alerts_count': active_alerts_count,
+        }
 
 
 class PriceMonitor:
     """价格监控器"""
 
     def __init__(self):
-        from .models import PriceAlert, Symbol
+        from .models import PriceAlert, Symbol, Notification
         self.PriceAlert = PriceAlert
         self.Symbol = Symbol
+        self.Notification = Notification
 
     def check_price_alerts(self, prices_data):
         """
         检查价格提醒
         prices_data: dict, {symbol_code: current_price}
+
+        条件判断按列向量化完成；过期、最后价格、触发状态和通知分别批量写入。
+        目标价最多4位小数，转为 float64 比较不会改变大小关系。
         """
-        active_alerts = self.PriceAlert.objects.filter(
-            status='active'
-        ).select_related('symbol', 'owner')
-
-        triggered_alerts = []
-        for alert in active_alerts:
-            symbol_code = alert.symbol.code
-            if symbol_code not in prices_data:
-                continue
+        prices = {code: Decimal(str(price)) for code, price in prices_data.items()}
+        if not prices:
+            return []
+        now = timezone.now()
+        active_alerts = self.PriceAlert.objects.filter(status='active', symbol__code__in=list(prices))
+
+        with transaction.atomic():
+            # 过期的提醒直接标记
+            active_alerts.filter(valid_until__lt=now).update(status='expired')
+
+            rows = list(active_alerts.exclude(valid_until__lt=now).values_list(
+                'id', 'symbol_id', 'symbol__code', 'condition', 'target_price', 'last_price'
+            ))
+            if not rows:
+                return []
+            ids, symbol_ids, codes, conditions, targets, last_prices = zip(*rows)
+
+            condition = np.array(conditions)
+            target = np.array(targets, dtype=np.float64)
+            current = np.array([prices[code] for code in codes], dtype=np.float64)
+            # 没有（或为0的）最后价格不参与穿越判断，NaN 比较恒为 False
+            last = np.array([p if p else np.nan for p in last_prices], dtype=np.float64)
+
+            triggered_mask = (
+                ((condition == 'above') & (current >= target))
+                | ((condition == 'below') & (current <= target))
+                | ((condition == 'cross_up') & (last < target) & (target <= current))
+                | ((condition == 'cross_down') & (last > target) & (target >= current))
+            )
+
+            # 更新最后价格（同一标的价格相同，一条 UPDATE 完成）
+            symbol_prices = dict(zip(symbol_ids, (prices[code] for code in codes)))
+            self.PriceAlert.objects.filter(id__in=ids).update(last_price=Case(
+                *[When(symbol_id=symbol_id, then=Value(price)) for symbol_id, price in symbol_prices.items()],
+                output_field=self.PriceAlert._meta.get_field('last_price')
+            ))
 
-            current_price = Decimal(str(prices_data[symbol_code]))
-            if alert.check_condition(current_price):
-                alert.trigger()
-                triggered_alerts.append(alert)
+            triggered_ids = [alert_id for alert_id, hit in zip(ids, triggered_mask.tolist()) if hit]
+            triggered_alerts = list(
+                self.PriceAlert.objects.filter(id__in=triggered_ids).select_related('symbol', 'owner')
+            )
+            for alert in triggered_alerts:
+                alert.last_price = prices[alert.symbol.code]
+                alert.triggered_at = now
+                alert.trigger_count += 1
+                if alert.trigger_once:
+                    alert.status = 'triggered'
                 logger.info(f"Price alert triggered: {alert.symbol.code} {alert.get_condition_display()} {alert.target_price}")
 
+            if triggered_alerts:
+                self.PriceAlert.objects.bulk_update(triggered_alerts, ['triggered_at', 'trigger_count', 'status'])
+                self.Notification.objects.bulk_create(
+                    [alert.build_notification() for alert in triggered_alerts]
+                )
+
         return triggered_alerts
 
     def check_expired_alerts(self):
@@ -620,55 +813,110 @@ class StrategyPerformanceUpdater:
         self.TradeLog = TradeLog
 
     def update_all_strategies(self):
-        """更新所有策略的绩效指标"""
-        strategies = self.Strategy.objects.filter(status__in=['active', 'paused'])
-        results = []
+        """更新所有策略的绩效指标
 
-        for strategy in strategies:
-            result = self.update_strategy_metrics(strategy)
-            if result:
-                results.append(result)
+        所有策略的交易统计按 strategy_id 一次分组聚合，指标记录批量创建/更新。
+        """
+        strategies = list(self.Strategy.objects.filter(status__in=['active', 'paused']))
+        if not strategies:
+            return []
+        strategy_ids = [strategy.id for strategy in strategies]
+
+        stats_map = {
+            row['strategy_id']: row
+            for row in self.TradeLog.objects.filter(
+                strategy_id__in=strategy_ids,
+                status='filled'
+            ).values('strategy_id').annotate(**self._stats_aggregates()).order_by()
+        }
+        metrics_map = {
+            m.strategy_id: m
+            for m in self.PerformanceMetrics.objects.filter(strategy_id__in=strategy_ids)
+        }
 
+        to_create = []
+        to_update = []
+        results = []
+        for strategy in strategies:
+            stats = stats_map.get(strategy.id)
+            if not stats:
+                continue
+            metrics = metrics_map.get(strategy.id)
+            if metrics is None:
+                metrics = self.PerformanceMetrics(strategy=strategy)
+                to_create.append(metrics)
+            else:
+                # 复用已加载的策略对象，日志与调用方读取 metrics.strategy 时不再逐条查询
+                metrics.strategy = strategy
+                to_update.append(metrics)
+            self._apply_stats(metrics, stats)
+            results.append(metrics)
+
+        with transaction.atomic():
+            if to_create:
+                self.PerformanceMetrics.objects.bulk_create(to_create)
+            if to_update:
+                # bulk_update 不会触发 auto_now，手动更新时间戳
+                now = timezone.now()
+                for metrics in to_update:
+                    metrics.updated_at = now
+                self.PerformanceMetrics.objects.bulk_update(to_update, [*METRICS_STAT_FIELDS, 'updated_at'])
+
+        for metrics in results:
+            logger.info(f"Updated performance metrics for strategy: {metrics.strategy.name}")
         return results
 
     def update_strategy_metrics(self, strategy):
         """更新单个策略的绩效指标"""
-        trades = self.TradeLog.objects.filter(
+        # 计算基本统计（一次条件聚合）
+        stats = self.TradeLog.objects.filter(
             strategy=strategy,
             status='filled'
-        )
+        ).aggregate(**self._stats_aggregates())
 
-        if not trades.exists():
+        if stats['total_trades'] == 0:
             return None
 
         # 获取或创建绩效指标记录
         metrics, created = self.PerformanceMetrics.objects.get_or_create(
             strategy=strategy
         )
+        self._apply_stats(metrics, stats)
+        metrics.save()
 
-        # 计算基本统计
-        total_trades = trades.count()
-        profitable_trades = trades.filter(profit_loss__gt=0).count()
-        losing_trades = trades.filter(profit_loss__lt=0).count()
+        logger.info(f"Updated performance metrics for strategy: {strategy.name}")
+        return metrics
 
-        total_profit = trades.filter(profit_loss__gt=0).aggregate(
-            total=Sum('profit_loss')
-        )['total'] or Decimal('0')
+    @staticmethod
+    def _stats_aggregates():
+        """绩效统计的条件聚合表达式"""
+        win = Q(profit_loss__gt=0)
+        loss = Q(profit_loss__lt=0)
+        return {
+            'total_trades': Count('id'),
+            'profitable_trades': Count('id', filter=win),
+            'losing_trades': Count('id', filter=loss),
+            'total_profit': Sum('profit_loss', filter=win),
+            'total_loss': Sum('profit_loss', filter=loss),
+            'largest_profit': Max('profit_loss', filter=win),
+            'largest_loss': Min('profit_loss', filter=loss),
+        }
 
-        total_loss = abs(trades.filter(profit_loss__lt=0).aggregate(
-            total=Sum('profit_loss')
-        )['total'] or Decimal('0'))
+    @staticmethod
+    def _apply_stats(metrics, stats):
+        """把聚合结果换算为绩效指标字段（不保存）"""
+        total_trades = stats['total_trades']
+        profitable_trades = stats['profitable_trades']
+        losing_trades = stats['losing_trades']
+        total_profit = stats['total_profit'] or Decimal('0')
+        total_loss = abs(stats['total_loss'] or Decimal('0'))
 
         # 计算平均值
         avg_profit = total_profit / profitable_trades if profitable_trades > 0 else Decimal('0')
         avg_loss = total_loss / losing_trades if losing_trades > 0 else Decimal('0')
 
-        # 最大盈亏
-        largest_profit = trades.filter(profit_loss__gt=0).order_by('-profit_loss').first()
-        largest_loss = trades.filter(profit_loss__lt=0).order_by('profit_loss').first()
-
         # 胜率和盈亏比
-        win_rate = Decimal(profitable_trades / total_trades * 100) if total_trades > 0 else Decimal('0')
+        win_rate = _percent(profitable_trades, total_trades)
         profit_factor = total_profit / total_loss if total_loss > 0 else None
 
         # 更新指标
@@ -681,15 +929,10 @@ class StrategyPerformanceUpdater:
         metrics.profit_factor = profit_factor
         metrics.average_profit = avg_profit
         metrics.average_loss = avg_loss
-        metrics.largest_profit = largest_profit.profit_loss if largest_profit else Decimal('0')
-        metrics.largest_loss = largest_loss.profit_loss if largest_loss else Decimal('0')
+        metrics.largest_profit = stats['largest_profit'] or Decimal('0')
+        metrics.largest_loss = stats['largest_loss'] or Decimal('0')
         metrics.total_return = total_profit - total_loss
 
-        metrics.save()
-
-        logger.info(f"Updated performance metrics for strategy: {strategy.name}")
-        return metrics
-
 
 class TradePlanChecker:
     """交易计划检查器"""
@@ -708,18 +951,15 @@ class TradePlanChecker:
         expiring_plans = self.TradePlan.objects.filter(
             status='pending',
             plan_date=today
-        ).select_related('symbol', 'account', 'account__owner')
-
-        notified = []
-        for plan in expiring_plans:
-            try:
-                service = self.NotificationService(plan.account.owner)
-                service.notify_plan_reminder(plan)
-                notified.append(plan)
-                logger.info(f"Sent plan reminder for: {plan.symbol.code}")
-            except Exception as e:
-                logger.error(f"Failed to send plan reminder: {e}")
+        ).select_related('symbol')
 
+        notified = list(expiring_plans)
+        for plan in notified:
+            logger.info(f"Sent plan reminder for: {plan.symbol.code}")
+
+        # 通知由 Celery 异步发送
+        from .tasks import send_plan_reminders
+        _dispatch_notifications(send_plan_reminders, [plan.id for plan in notified])
         return notified
 
     def expire_old_plans(self):
@@ -757,18 +997,21 @@ def run_daily_tasks():
     }
 
     try:
+        # 活跃账户只查询一次，供以下各步骤共用
+        accounts = active_accounts()
+
         # 1. 生成每日报表（昨天的）
         report_gen = ReportGenerator()
-        results['daily_reports'] = report_gen.generate_daily_report()
+        results['daily_reports'] = report_gen.generate_daily_report(accounts=accounts)
         logger.info(f"Generated {len(results['daily_reports']) if results['daily_reports'] else 0} daily reports")
 
         # 2. 更新风险快照
         risk_monitor = RiskMonitor()
-        results['risk_snapshots'] = risk_monitor.update_risk_snapshot()
+        results['risk_snapshots'] = risk_monitor.update_risk_snapshot(accounts=accounts)
         logger.info(f"Updated {len(results['risk_snapshots'])} risk snapshots")
 
         # 3. 检查风险规则
-        results['risk_alerts'] = risk_monitor.check_all_rules()
+        results['risk_alerts'] = risk_monitor.check_all_rules(accounts=accounts)
         logger.info(f"Generated {len(results['risk_alerts'])} risk alerts")
 
         # 4. 过期交易计划
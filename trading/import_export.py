@@ -2,12 +2,205 @@
 数据导入导出模块
 提供交易数据的导入和导出功能
 """
+import codecs
 import csv
 import io
 from datetime import datetime
 from decimal import Decimal, InvalidOperation
+from functools import lru_cache
 from django.utils import timezone
 from django.db import transaction
+from django.db.models import Q
+
+# 流式导出时每次从数据库取回的行数
+EXPORT_CHUNK_SIZE = 2000
+# 流式导出时每块输出的大致字符数
+EXPORT_FLUSH_SIZE = 64 * 1024
+# 导入时每批写入的行数
+IMPORT_BATCH_SIZE = 1000
+# 导入结果中最多保留的错误信息条数（错误总数另行计数）
+MAX_IMPORT_ERRORS = 50
+
+
+# 导入交易时间支持的格式（各格式能匹配的字符串互不重叠）
+TRADE_TIME_FORMATS = ('%Y-%m-%d %H:%M:%S', '%Y-%m-%d %H:%M', '%Y-%m-%d', '%Y/%m/%d %H:%M:%S', '%Y/%m/%d')
+# (长度, 是否用 / 分隔) -> 标准写法对应的格式，命中时只需尝试一次 strptime
+_TRADE_TIME_FORMAT_HINTS = {
+    (19, False): '%Y-%m-%d %H:%M:%S',
+    (16, False): '%Y-%m-%d %H:%M',
+    (10, False): '%Y-%m-%d',
+    (19, True): '%Y/%m/%d %H:%M:%S',
+    (10, True): '%Y/%m/%d',
+}
+
+
+def _parse_trade_time(value, tz):
+    """解析交易时间并附加时区，无法解析时返回 None
+
+    先按字符串长度和分隔符猜测格式，猜不中（如月、日不补零）再依次尝试其余格式。
+    """
+    hint = _TRADE_TIME_FORMAT_HINTS.get((len(value), '/' in value))
+    formats = TRADE_TIME_FORMATS
+    if hint:
+        formats = (hint,) + tuple(fmt for fmt in TRADE_TIME_FORMATS if fmt != hint)
+    for fmt in formats:
+        try:
+            return datetime.strptime(value, fmt).replace(tzinfo=tz)
+        except ValueError:
+            continue
+    return None
+
+
+# 交易导入的列名映射
+TRADE_COLUMN_MAP = {
+    '交易时间': 'trade_time',
+    '标的代码': 'symbol_code',
+    '方向': 'side',
+    '数量': 'quantity',
+    '价格': 'price',
+    '委托价': 'price',
+    '成交价': 'executed_price',
+    '手续费': 'commission',
+    '盈亏': 'profit_loss',
+    '订单ID': 'order_id',
+    '备注': 'notes',
+    '滑点': 'slippage',
+}
+
+# 交易方向映射
+TRADE_SIDE_MAP = {
+    '买入': 'buy', '买': 'buy', 'buy': 'buy', 'B': 'buy', 'b': 'buy',
+    '卖出': 'sell', '卖': 'sell', 'sell': 'sell', 'S': 'sell', 's': 'sell',
+}
+
+# 去掉数值文本中的千分位逗号
+_COMMA_TBL = str.maketrans('', '', ',')
+
+
+def _map_columns(rows, column_map):
+    """根据表头计算 (原列名, 字段名) 列表，列名两端的空格忽略
+
+    同一字段对应多列时后面的列优先，与逐列覆盖的结果一致。
+    """
+    if not rows:
+        return []
+    return [
+        (key, column_map[key.strip()])
+        for key in rows[0]
+        if key is not None and key.strip() in column_map
+    ]
+
+
+def _parse_trade_row(data, symbols, tz):
+    """校验并解析一行交易数据（不访问数据库）
+
+    Args:
+        data: 已按 TRADE_COLUMN_MAP 标准化列名的行
+        symbols: 标的代码 -> Symbol 的映射
+        tz: 交易时间使用的时区
+    Returns:
+        (字段字典, None)，字段可直接用于创建 TradeLog；校验失败时返回 (None, 错误信息)
+    """
+    # 验证必填字段
+    if not data.get('symbol_code'):
+        return None, '缺少标的代码'
+    if not data.get('side'):
+        return None, '缺少交易方向'
+    if not data.get('quantity'):
+        return None, '缺少数量'
+    if not data.get('price'):
+        return None, '缺少价格'
+
+    # 查找标的
+    symbol = symbols.get(data['symbol_code'])
+    if not symbol:
+        return None, f"标的代码 '{data['symbol_code']}' 不存在"
+
+    # 解析方向
+    side = TRADE_SIDE_MAP.get(data['side'])
+    if not side:
+        return None, f"无效的交易方向 '{data['side']}'"
+
+    # 解析数量和价格
+    quantity = _parse_amount(data['quantity'])
+    if quantity is None:
+        return None, f"无效的数量 '{data['quantity']}'"
+    price = _parse_amount(data['price'])
+    if price is None:
+        return None, f"无效的价格 '{data['price']}'"
+
+    # 解析交易时间
+    trade_time = None
+    if data.get('trade_time'):
+        trade_time = _parse_trade_time(data['trade_time'], tz)
+    if trade_time is None:
+        trade_time = timezone.now()
+
+    return {
+        'symbol': symbol,
+        'side': side,
+        'quantity': quantity,
+        'price': price,
+        # 可选字段无效时取默认值
+        'executed_price': _parse_amount(data.get('executed_price')) or price,
+        'commission': _parse_amount(data.get('commission'), Decimal('0')),
+        'slippage': _parse_amount(data.get('slippage'), Decimal('0')),
+        'profit_loss': _parse_amount(data.get('profit_loss'), Decimal('0')),
+        'trade_time': trade_time,
+        'notes': data.get('notes', ''),
+    }, None
+
+
+def _parse_amount(value, default=None):
+    """把导入的数值文本转换为 Decimal（允许千分位逗号），为空或无效时返回 default
+
+    直接由原始文本构造 Decimal，金额不经过浮点数，不会损失精度。
+    """
+    if not value:
+        return default
+    try:
+        return Decimal(value.translate(_COMMA_TBL))
+    except (InvalidOperation, ValueError):
+        return default
+
+
+def _format_datetime(value):
+    """格式化为 'YYYY-MM-DD HH:MM:SS'，与 strftime('%Y-%m-%d %H:%M:%S') 结果相同
+
+    isoformat 不用逐次解析格式串，约快一倍；截掉带时区时末尾的偏移量。
+    """
+    return value.isoformat(' ', 'seconds')[:19]
+
+
+@lru_cache(maxsize=None)
+def _choice_labels(model, field_name):
+    """字段选项值 -> 显示名，与 get_FOO_display() 取值相同（选项固定，按模型字段缓存）"""
+    return dict(model._meta.get_field(field_name).flatchoices)
+
+
+def _csv_line(fields):
+    """把一行字符串字段拼成 CSV 文本，至少两个字段时输出与 csv.writer（excel 方言）一致
+
+    单个空字段时 csv.writer 会写出 '""'，这里不处理（导出与模板的行都有多个字段）。
+
+    交易数据的字段很少需要加引号：整行拼接后没有多余的逗号、引号和换行时直接返回，
+    否则只给含特殊字符的字段加引号（字段内的引号写成两个）。
+    """
+    line = ','.join(fields)
+    if line.count(',') == len(fields) - 1 and '"' not in line and '\n' not in line and '\r' not in line:
+        return line + '\r\n'
+    return ','.join(
+        '"' + field.replace('"', '""') + '"'
+        if (',' in field or '"' in field or '\n' in field or '\r' in field) else field
+        for field in fields
+    ) + '\r\n'
+
+
+class _Echo:
+    """csv.writer 的伪文件对象：write() 直接返回写入的内容，便于逐行生成"""
+
+    def write(self, value):
+        return value
 
 
 class DataExporter:
@@ -24,15 +217,16 @@ class DataExporter:
         self.Symbol = Symbol
         self.Strategy = Strategy
 
-    def export_trades_csv(self, account=None, start_date=None, end_date=None):
+    def iter_trades_csv(self, account=None, start_date=None, end_date=None):
         """
-        导出交易记录为CSV格式
-        Returns:
-            StringIO对象，包含CSV数据
+        分块生成交易记录CSV
+        按 EXPORT_CHUNK_SIZE 分批从数据库读取，内存占用与导出行数无关
+        Yields:
+            CSV文本块（表头一块，数据行每块约 EXPORT_FLUSH_SIZE 个字符）
         """
         qs = self.TradeLog.objects.filter(
             account__owner=self.user
-        ).select_related('account', 'symbol', 'strategy')
+        )
 
         if account:
             qs = qs.filter(account=account)
@@ -41,10 +235,16 @@ class DataExporter:
         if end_date:
             qs = qs.filter(trade_time__date__lte=end_date)
 
-        qs = qs.order_by('trade_time')
+        # 只取导出用到的列，关联名称在同一条 SQL 中 JOIN 取回，不实例化模型
+        qs = qs.order_by('trade_time').values(
+            'trade_time', 'account__name', 'symbol__code', 'symbol__name', 'side',
+            'quantity', 'price', 'executed_price', 'commission', 'slippage',
+            'profit_loss', 'status', 'order_id', 'strategy__name', 'notes',
+        )
+        side_display = _choice_labels(self.TradeLog, 'side')
+        status_display = _choice_labels(self.TradeLog, 'status')
 
-        output = io.StringIO()
-        writer = csv.writer(output)
+        writer = csv.writer(_Echo())
 
         # 写入表头
         headers = [
@@ -52,134 +252,168 @@ class DataExporter:
             '委托价', '成交价', '手续费', '滑点', '盈亏', '状态',
             '订单ID', '策略', '备注'
         ]
-        writer.writerow(headers)
-
-        # 写入数据
-        for trade in qs:
-            row = [
-                trade.trade_time.strftime('%Y-%m-%d %H:%M:%S'),
-                trade.account.name,
-                trade.symbol.code,
-                trade.symbol.name,
-                trade.get_side_display(),
-                str(trade.quantity),
-                str(trade.price),
-                str(trade.executed_price) if trade.executed_price else '',
-                str(trade.commission),
-                str(trade.slippage),
-                str(trade.profit_loss),
-                trade.get_status_display(),
-                trade.order_id,
-                trade.strategy.name if trade.strategy else '',
-                trade.notes,
-            ]
-            writer.writerow(row)
+        yield writer.writerow(headers)
+
+        # 写入数据：行文本先攒在缓冲区，约 EXPORT_FLUSH_SIZE 个字符输出一次
+        # 数据库取回的 Decimal 已按字段小数位量化，str() 不会出现科学计数法，且比 format(x, 'f') 快
+        buffer = []
+        buffered = 0
+        for trade in qs.iterator(chunk_size=EXPORT_CHUNK_SIZE):
+            line = _csv_line([
+                _format_datetime(trade['trade_time']),
+                trade['account__name'],
+                trade['symbol__code'],
+                trade['symbol__name'],
+                side_display.get(trade['side'], trade['side']),
+                str(trade['quantity']),
+                str(trade['price']),
+                str(trade['executed_price']) if trade['executed_price'] else '',
+                str(trade['commission']),
+                str(trade['slippage']),
+                str(trade['profit_loss']),
+                status_display.get(trade['status'], trade['status']),
+                trade['order_id'],
+                trade['strategy__name'] or '',
+                trade['notes'],
+            ])
+            buffer.append(line)
+            buffered += len(line)
+            if buffered >= EXPORT_FLUSH_SIZE:
+                yield ''.join(buffer)
+                buffer = []
+                buffered = 0
+        if buffer:
+            yield ''.join(buffer)
 
-        output.seek(0)
-        return output
+    def export_trades_csv(self, account=None, start_date=None, end_date=None):
+        """
+        导出交易记录为CSV格式
+        Returns:
+            StringIO对象，包含CSV数据
+        """
+        return _to_string_io(self.iter_trades_csv(account=account, start_date=start_date, end_date=end_date))
 
-    def export_accounts_csv(self):
-        """导出账户数据为CSV格式"""
-        qs = self.Account.objects.filter(owner=self.user)
+    def iter_accounts_csv(self):
+        """逐行生成账户数据CSV"""
+        qs = self.Account.objects.filter(owner=self.user).values(
+            'name', 'account_type', 'broker', 'account_id', 'initial_balance',
+            'current_balance', 'available_balance', 'status', 'created_at', 'notes',
+        )
+        type_display = _choice_labels(self.Account, 'account_type')
+        status_display = _choice_labels(self.Account, 'status')
 
-        output = io.StringIO()
-        writer = csv.writer(output)
+        writer = csv.writer(_Echo())
 
         headers = [
             '账户名称', '账户类型', '券商', '账户ID', '初始资金',
             '当前余额', '可用余额', '总盈亏', '盈亏比例', '状态', '创建时间', '备注'
         ]
-        writer.writerow(headers)
+        yield writer.writerow(headers)
 
-        for account in qs:
+        for account in qs.iterator(chunk_size=EXPORT_CHUNK_SIZE):
+            # 与 Account.total_profit_loss / profit_loss_ratio 相同的计算
+            initial_balance = account['initial_balance']
+            total_profit_loss = account['current_balance'] - initial_balance
+            profit_loss_ratio = (total_profit_loss / initial_balance) * 100 if initial_balance > 0 else 0
             row = [
-                account.name,
-                account.get_account_type_display(),
-                account.broker,
-                account.account_id,
-                str(account.initial_balance),
-                str(account.current_balance),
-                str(account.available_balance),
-                str(account.total_profit_loss),
-                f'{account.profit_loss_ratio:.2f}%',
-                account.get_status_display(),
-                account.created_at.strftime('%Y-%m-%d %H:%M:%S'),
-                account.notes,
+                account['name'],
+                type_display.get(account['account_type'], account['account_type']),
+                account['broker'],
+                account['account_id'],
+                str(initial_balance),
+                str(account['current_balance']),
+                str(account['available_balance']),
+                str(total_profit_loss),
+                f'{profit_loss_ratio:.2f}%',
+                status_display.get(account['status'], account['status']),
+                _format_datetime(account['created_at']),
+                account['notes'],
             ]
-            writer.writerow(row)
+            yield writer.writerow(row)
 
-        output.seek(0)
-        return output
+    def export_accounts_csv(self):
+        """导出账户数据为CSV格式"""
+        return _to_string_io(self.iter_accounts_csv())
 
-    def export_positions_csv(self, account=None):
-        """导出持仓数据为CSV格式"""
+    def iter_positions_csv(self, account=None):
+        """逐行生成持仓数据CSV"""
         qs = self.Position.objects.filter(
             account__owner=self.user
-        ).select_related('account', 'symbol')
+        )
 
         if account:
             qs = qs.filter(account=account)
 
-        output = io.StringIO()
-        writer = csv.writer(output)
+        qs = qs.values(
+            'account__name', 'symbol__code', 'symbol__name', 'quantity', 'avg_price',
+            'current_price', 'market_value', 'profit_loss', 'profit_loss_ratio', 'updated_at',
+        )
+
+        writer = csv.writer(_Echo())
 
         headers = [
             '账户', '标的代码', '标的名称', '持仓数量', '平均成本',
             '当前价格', '市值', '盈亏', '盈亏比例', '更新时间'
         ]
-        writer.writerow(headers)
+        yield writer.writerow(headers)
 
-        for pos in qs:
+        for pos in qs.iterator(chunk_size=EXPORT_CHUNK_SIZE):
             row = [
-                pos.account.name,
-                pos.symbol.code,
-                pos.symbol.name,
-                str(pos.quantity),
-                str(pos.avg_price),
-                str(pos.current_price) if pos.current_price else '',
-                str(pos.market_value),
-                str(pos.profit_loss),
-                f'{pos.profit_loss_ratio:.2f}%',
-                pos.updated_at.strftime('%Y-%m-%d %H:%M:%S'),
+                pos['account__name'],
+                pos['symbol__code'],
+                pos['symbol__name'],
+                str(pos['quantity']),
+                str(pos['avg_price']),
+                str(pos['current_price']) if pos['current_price'] else '',
+                str(pos['market_value']),
+                str(pos['profit_loss']),
+                f"{pos['profit_loss_ratio']:.2f}%",
+                _format_datetime(pos['updated_at']),
             ]
-            writer.writerow(row)
-
-        output.seek(0)
-        return output
+            yield writer.writerow(row)
 
-    def export_symbols_csv(self):
-        """导出交易标的为CSV格式"""
-        qs = self.Symbol.objects.all()
+    def export_positions_csv(self, account=None):
+        """导出持仓数据为CSV格式"""
+        return _to_string_io(self.iter_positions_csv(account=account))
+
+    def iter_symbols_csv(self):
+        """逐行生成交易标的CSV"""
+        qs = self.Symbol.objects.values(
+            'code', 'name', 'symbol_type', 'exchange', 'currency', 'contract_size',
+            'minimum_tick', 'margin_rate', 'commission_rate', 'commission_per_contract',
+            'is_active', 'description',
+        )
+        type_display = _choice_labels(self.Symbol, 'symbol_type')
 
-        output = io.StringIO()
-        writer = csv.writer(output)
+        writer = csv.writer(_Echo())
 
         headers = [
             '标的代码', '标的名称', '类型', '交易所', '计价货币',
             '合约乘数', '最小变动', '保证金率', '手续费率', '每手手续费',
             '是否活跃', '描述'
         ]
-        writer.writerow(headers)
+        yield writer.writerow(headers)
 
-        for symbol in qs:
+        for symbol in qs.iterator(chunk_size=EXPORT_CHUNK_SIZE):
             row = [
-                symbol.code,
-                symbol.name,
-                symbol.get_symbol_type_display(),
-                symbol.exchange,
-                symbol.currency,
-                str(symbol.contract_size),
-                str(symbol.minimum_tick),
-                str(symbol.margin_rate) if symbol.margin_rate else '',
-                str(symbol.commission_rate) if symbol.commission_rate else '',
-                str(symbol.commission_per_contract),
-                '是' if symbol.is_active else '否',
-                symbol.description,
+                symbol['code'],
+                symbol['name'],
+                type_display.get(symbol['symbol_type'], symbol['symbol_type']),
+                symbol['exchange'],
+                symbol['currency'],
+                str(symbol['contract_size']),
+                str(symbol['minimum_tick']),
+                str(symbol['margin_rate']) if symbol['margin_rate'] else '',
+                str(symbol['commission_rate']) if symbol['commission_rate'] else '',
+                str(symbol['commission_per_contract']),
+                '是' if symbol['is_active'] else '否',
+                symbol['description'],
             ]
-            writer.writerow(row)
+            yield writer.writerow(row)
 
-        output.seek(0)
-        return output
+    def export_symbols_csv(self):
+        """导出交易标的为CSV格式"""
+        return _to_string_io(self.iter_symbols_csv())
 
     def export_analysis_csv(self, account=None, start_date=None, end_date=None):
         """导出分析报告为CSV格式"""
@@ -272,12 +506,21 @@ class DataExporter:
         return output
 
 
+def _to_string_io(lines):
+    """把逐行生成的CSV收集到 StringIO 中"""
+    output = io.StringIO()
+    output.writelines(lines)
+    output.seek(0)
+    return output
+
+
 class DataImporter:
     """数据导入服务类"""
 
     def __init__(self, user):
         self.user = user
         self.errors = []
+        self.error_count = 0
         self.success_count = 0
         self.skip_count = 0
 
@@ -291,8 +534,13 @@ class DataImporter:
     def parse_csv(self, file_content):
         """解析CSV文件内容"""
         if isinstance(file_content, bytes):
-            # 尝试不同编码
-            for encoding in ['utf-8', 'gbk', 'gb2312', 'utf-8-sig']:
+            # 带 BOM 的一定是 UTF-8（本模块导出的文件即如此），直接解码并去掉 BOM；
+            # 否则先按 UTF-8 再按 GBK 尝试（GB2312 是 GBK 的子集，无需单独尝试）
+            if file_content.startswith(codecs.BOM_UTF8):
+                encodings = ('utf-8-sig',)
+            else:
+                encodings = ('utf-8', 'gbk')
+            for encoding in encodings:
                 try:
                     content = file_content.decode(encoding)
                     break
@@ -312,20 +560,21 @@ class DataImporter:
         CSV格式要求列：交易时间, 标的代码, 方向, 数量, 价格, 成交价, 手续费, 盈亏, 订单ID, 备注
         """
         self.errors = []
+        self.error_count = 0
         self.success_count = 0
         self.skip_count = 0
 
         try:
             rows = self.parse_csv(file_content)
         except Exception as e:
-            self.errors.append(f'CSV解析错误: {str(e)}')
+            self._add_error(f'CSV解析错误: {str(e)}')
             return False
 
         # 验证账户
         try:
             account = self.Account.objects.get(id=account_id, owner=self.user)
         except self.Account.DoesNotExist:
-            self.errors.append('账户不存在或无权限')
+            self._add_error('账户不存在或无权限')
             return False
 
         # 获取默认策略
@@ -336,160 +585,78 @@ class DataImporter:
             except self.Strategy.DoesNotExist:
                 pass
 
-        # 预加载标的映射
-        symbols = {s.code: s for s in self.Symbol.objects.all()}
+        # 列名在整个文件内相同，按表头一次算出对应关系
+        columns = _map_columns(rows, TRADE_COLUMN_MAP)
 
-        # 列名映射
-        column_map = {
-            '交易时间': 'trade_time',
-            '标的代码': 'symbol_code',
-            '方向': 'side',
-            '数量': 'quantity',
-            '价格': 'price',
-            '委托价': 'price',
-            '成交价': 'executed_price',
-            '手续费': 'commission',
-            '盈亏': 'profit_loss',
-            '订单ID': 'order_id',
-            '备注': 'notes',
-            '滑点': 'slippage',
+        # 只预加载文件中出现的标的（保存交易时的手续费、持仓计算会读取标的的其他字段，
+        # 所以仍取完整的模型实例，同一标的的各行共用一个实例）
+        symbol_codes = {
+            (row.get(key) or '').strip()
+            for row in rows for key, field in columns if field == 'symbol_code'
         }
+        symbols = {s.code: s for s in self.Symbol.objects.filter(code__in=symbol_codes)}
 
-        # 方向映射
-        side_map = {
-            '买入': 'buy', '买': 'buy', 'buy': 'buy', 'B': 'buy', 'b': 'buy',
-            '卖出': 'sell', '卖': 'sell', 'sell': 'sell', 'S': 'sell', 's': 'sell',
+        # 一次查出已存在的订单ID（文件中给出的和本次将自动生成的），代替逐行 exists() 查询
+        id_prefix = f"IMP{timezone.now().strftime('%Y%m%d%H%M%S')}"
+        candidate_ids = {
+            (row.get(key) or '').strip()
+            for row in rows for key, field in columns if field == 'order_id'
         }
+        existing_ids = set(
+            self.TradeLog.objects.filter(
+                Q(order_id__in=candidate_ids) | Q(order_id__startswith=id_prefix)
+            ).values_list('order_id', flat=True)
+        )
+
+        tz = timezone.get_current_timezone()
+        to_create = []
+
+        for i, row in enumerate(rows, start=2):  # 从第2行开始（第1行是表头）
+            try:
+                if None in row:
+                    self._add_error(f'第{i}行: 列数多于表头')
+                    continue
 
+                # 标准化列名
+                data = {field: (row[key] or '').strip() for key, field in columns}
+
+                fields, error = _parse_trade_row(data, symbols, tz)
+                if error:
+                    self._add_error(f'第{i}行: {error}')
+                    continue
+
+                # 生成订单ID
+                order_id = data.get('order_id') or f"{id_prefix}{i:04d}"
+
+                # 检查订单ID是否已存在（包括文件中前面的行）
+                if order_id in existing_ids:
+                    self.skip_count += 1
+                    continue
+
+                existing_ids.add(order_id)
+                to_create.append((i, order_id, fields))
+
+            except Exception as e:
+                self._add_error(f'第{i}行: 处理错误 - {str(e)}')
+                continue
+
+        # 解析和校验在事务外完成，事务只包住写入；
+        # 交易记录的 save() 要同步持仓和资金，仍逐条 create 而不是 bulk_create
         with transaction.atomic():
-            for i, row in enumerate(rows, start=2):  # 从第2行开始（第1行是表头）
+            for i, order_id, fields in to_create:
                 try:
-                    # 标准化列名
-                    data = {}
-                    for key, value in row.items():
-                        if key in column_map:
-                            data[column_map[key]] = value.strip() if value else ''
-                        else:
-                            # 尝试去掉空格匹配
-                            clean_key = key.strip()
-                            if clean_key in column_map:
-                                data[column_map[clean_key]] = value.strip() if value else ''
-
-                    # 验证必填字段
-                    if not data.get('symbol_code'):
-                        self.errors.append(f'第{i}行: 缺少标的代码')
-                        continue
-
-                    if not data.get('side'):
-                        self.errors.append(f'第{i}行: 缺少交易方向')
-                        continue
-
-                    if not data.get('quantity'):
-                        self.errors.append(f'第{i}行: 缺少数量')
-                        continue
-
-                    if not data.get('price'):
-                        self.errors.append(f'第{i}行: 缺少价格')
-                        continue
-
-                    # 查找标的
-                    symbol = symbols.get(data['symbol_code'])
-                    if not symbol:
-                        self.errors.append(f"第{i}行: 标的代码 '{data['symbol_code']}' 不存在")
-                        continue
-
-                    # 解析方向
-                    side = side_map.get(data['side'])
-                    if not side:
-                        self.errors.append(f"第{i}行: 无效的交易方向 '{data['side']}'")
-                        continue
-
-                    # 解析数量
-                    try:
-                        quantity = Decimal(data['quantity'].replace(',', ''))
-                    except (InvalidOperation, ValueError):
-                        self.errors.append(f"第{i}行: 无效的数量 '{data['quantity']}'")
-                        continue
-
-                    # 解析价格
-                    try:
-                        price = Decimal(data['price'].replace(',', ''))
-                    except (InvalidOperation, ValueError):
-                        self.errors.append(f"第{i}行: 无效的价格 '{data['price']}'")
-                        continue
-
-                    # 解析可选字段
-                    executed_price = None
-                    if data.get('executed_price'):
-                        try:
-                            executed_price = Decimal(data['executed_price'].replace(',', ''))
-                        except (InvalidOperation, ValueError):
-                            pass
-
-                    commission = Decimal('0')
-                    if data.get('commission'):
-                        try:
-                            commission = Decimal(data['commission'].replace(',', ''))
-                        except (InvalidOperation, ValueError):
-                            pass
-
-                    profit_loss = Decimal('0')
-                    if data.get('profit_loss'):
-                        try:
-                            profit_loss = Decimal(data['profit_loss'].replace(',', ''))
-                        except (InvalidOperation, ValueError):
-                            pass
-
-                    slippage = Decimal('0')
-                    if data.get('slippage'):
-                        try:
-                            slippage = Decimal(data['slippage'].replace(',', ''))
-                        except (InvalidOperation, ValueError):
-                            pass
-
-                    # 解析交易时间
-                    trade_time = timezone.now()
-                    if data.get('trade_time'):
-                        for fmt in ['%Y-%m-%d %H:%M:%S', '%Y-%m-%d %H:%M', '%Y-%m-%d', '%Y/%m/%d %H:%M:%S', '%Y/%m/%d']:
-                            try:
-                                trade_time = datetime.strptime(data['trade_time'], fmt)
-                                trade_time = timezone.make_aware(trade_time)
-                                break
-                            except ValueError:
-                                continue
-
-                    # 生成订单ID
-                    order_id = data.get('order_id') or f"IMP{timezone.now().strftime('%Y%m%d%H%M%S')}{i:04d}"
-
-                    # 检查订单ID是否已存在
-                    if self.TradeLog.objects.filter(order_id=order_id).exists():
-                        self.skip_count += 1
-                        continue
-
-                    # 创建交易记录
                     self.TradeLog.objects.create(
                         account=account,
-                        symbol=symbol,
                         strategy=strategy,
-                        side=side,
-                        quantity=quantity,
-                        price=price,
-                        executed_price=executed_price or price,
-                        commission=commission,
-                        slippage=slippage,
-                        profit_loss=profit_loss,
                         status='filled',
                         order_id=order_id,
-                        trade_time=trade_time,
-                        notes=data.get('notes', ''),
+                        **fields,
                     )
                     self.success_count += 1
-
                 except Exception as e:
-                    self.errors.append(f'第{i}行: 处理错误 - {str(e)}')
-                    continue
+                    self._add_error(f'第{i}行: 处理错误 - {str(e)}')
 
-        return len(self.errors) == 0
+        return self.error_count == 0
 
     def import_symbols(self, file_content):
         """
@@ -497,13 +664,14 @@ class DataImporter:
         CSV格式要求列：标的代码, 标的名称, 类型, 交易所, 计价货币, 合约乘数
         """
         self.errors = []
+        self.error_count = 0
         self.success_count = 0
         self.skip_count = 0
 
         try:
             rows = self.parse_csv(file_content)
         except Exception as e:
-            self.errors.append(f'CSV解析错误: {str(e)}')
+            self._add_error(f'CSV解析错误: {str(e)}')
             return False
 
         # 类型映射
@@ -533,143 +701,143 @@ class DataImporter:
             '描述': 'description',
         }
 
-        with transaction.atomic():
-            for i, row in enumerate(rows, start=2):
-                try:
-                    # 标准化列名
-                    data = {}
-                    for key, value in row.items():
-                        clean_key = key.strip()
-                        if clean_key in column_map:
-                            data[column_map[clean_key]] = value.strip() if value else ''
-
-                    # 验证必填字段
-                    if not data.get('code'):
-                        self.errors.append(f'第{i}行: 缺少标的代码')
-                        continue
-
-                    if not data.get('name'):
-                        self.errors.append(f'第{i}行: 缺少标的名称')
-                        continue
-
-                    # 检查是否已存在
-                    if self.Symbol.objects.filter(code=data['code']).exists():
-                        self.skip_count += 1
-                        continue
-
-                    # 解析类型
-                    symbol_type = type_map.get(data.get('symbol_type', ''), 'stock')
-
-                    # 解析数值字段
-                    contract_size = Decimal('1')
-                    if data.get('contract_size'):
-                        try:
-                            contract_size = Decimal(data['contract_size'])
-                        except (InvalidOperation, ValueError):
-                            pass
-
-                    minimum_tick = Decimal('0.01')
-                    if data.get('minimum_tick'):
-                        try:
-                            minimum_tick = Decimal(data['minimum_tick'])
-                        except (InvalidOperation, ValueError):
-                            pass
-
-                    margin_rate = None
-                    if data.get('margin_rate'):
-                        try:
-                            margin_rate = Decimal(data['margin_rate'])
-                        except (InvalidOperation, ValueError):
-                            pass
-
-                    commission_rate = None
-                    if data.get('commission_rate'):
-                        try:
-                            commission_rate = Decimal(data['commission_rate'])
-                        except (InvalidOperation, ValueError):
-                            pass
-
-                    commission_per_contract = Decimal('0')
-                    if data.get('commission_per_contract'):
-                        try:
-                            commission_per_contract = Decimal(data['commission_per_contract'])
-                        except (InvalidOperation, ValueError):
-                            pass
-
-                    # 创建标的
-                    self.Symbol.objects.create(
-                        code=data['code'],
-                        name=data['name'],
-                        symbol_type=symbol_type,
-                        exchange=data.get('exchange', ''),
-                        currency=data.get('currency', 'CNY') or 'CNY',
-                        contract_size=contract_size,
-                        minimum_tick=minimum_tick,
-                        margin_rate=margin_rate,
-                        commission_rate=commission_rate,
-                        commission_per_contract=commission_per_contract,
-                        description=data.get('description', ''),
-                    )
-                    self.success_count += 1
+        # 列名在整个文件内相同，按表头一次算出对应关系
+        columns = _map_columns(rows, column_map)
 
-                except Exception as e:
-                    self.errors.append(f'第{i}行: 处理错误 - {str(e)}')
+        # 一次查出文件中已存在的标的代码，代替逐行 exists() 查询
+        candidate_codes = {
+            (row.get(key) or '').strip()
+            for row in rows for key, field in columns if field == 'code'
+        }
+        existing_codes = set(
+            self.Symbol.objects.filter(code__in=candidate_codes).values_list('code', flat=True)
+        )
+        pending = []
+
+        for i, row in enumerate(rows, start=2):
+            try:
+                if None in row:
+                    self._add_error(f'第{i}行: 列数多于表头')
+                    continue
+
+                # 标准化列名
+                data = {field: (row[key] or '').strip() for key, field in columns}
+
+                # 验证必填字段
+                if not data.get('code'):
+                    self._add_error(f'第{i}行: 缺少标的代码')
+                    continue
+
+                if not data.get('name'):
+                    self._add_error(f'第{i}行: 缺少标的名称')
                     continue
 
-        return len(self.errors) == 0
+                # 检查是否已存在（包括文件中前面的行）
+                if data['code'] in existing_codes:
+                    self.skip_count += 1
+                    continue
+
+                # 解析类型
+                symbol_type = type_map.get(data.get('symbol_type', ''), 'stock')
+
+                # 解析数值字段
+                contract_size = _parse_amount(data.get('contract_size'), Decimal('1'))
+                minimum_tick = _parse_amount(data.get('minimum_tick'), Decimal('0.01'))
+                margin_rate = _parse_amount(data.get('margin_rate'))
+                commission_rate = _parse_amount(data.get('commission_rate'))
+                commission_per_contract = _parse_amount(data.get('commission_per_contract'), Decimal('0'))
+
+                # 创建标的（解析完成后统一批量写入）
+                pending.append(self.Symbol(
+                    code=data['code'],
+                    name=data['name'],
+                    symbol_type=symbol_type,
+                    exchange=data.get('exchange', ''),
+                    currency=data.get('currency', 'CNY') or 'CNY',
+                    contract_size=contract_size,
+                    minimum_tick=minimum_tick,
+                    margin_rate=margin_rate,
+                    commission_rate=commission_rate,
+                    commission_per_contract=commission_per_contract,
+                    description=data.get('description', ''),
+                ))
+                existing_codes.add(data['code'])
+                self.success_count += 1
+
+            except Exception as e:
+                self._add_error(f'第{i}行: 处理错误 - {str(e)}')
+                continue
+
+        # 解析和校验在事务外完成，事务只包住批量写入
+        if pending:
+            with transaction.atomic():
+                self.Symbol.objects.bulk_create(pending, batch_size=IMPORT_BATCH_SIZE, ignore_conflicts=True)
+
+        return self.error_count == 0
+
+    def _add_error(self, message):
+        """记录一条错误，只保留前 MAX_IMPORT_ERRORS 条信息，错误文件再大也不会占满内存"""
+        self.error_count += 1
+        if len(self.errors) < MAX_IMPORT_ERRORS:
+            self.errors.append(message)
 
     def get_import_result(self):
         """获取导入结果"""
         return {
-            'success': len(self.errors) == 0,
+            'success': self.error_count == 0,
             'success_count': self.success_count,
             'skip_count': self.skip_count,
-            'error_count': len(self.errors),
-            'errors': self.errors[:50],  # 只返回前50个错误
+            'error_count': self.error_count,
+            'errors': self.errors,  # 只保留前 MAX_IMPORT_ERRORS 个错误
         }
 
 
-def get_trade_import_template():
-    """获取交易导入模板"""
-    output = io.StringIO()
-    writer = csv.writer(output)
-
-    headers = [
+# 导入模板内容固定，模块加载时生成一次
+_TRADE_TEMPLATE_ROWS = (
+    [
         '交易时间', '标的代码', '方向', '数量', '价格', '成交价',
         '手续费', '滑点', '盈亏', '订单ID', '备注'
-    ]
-    writer.writerow(headers)
-
+    ],
     # 示例数据
-    writer.writerow([
+    [
         '2025-01-01 09:30:00', 'AAPL', '买入', '100', '150.00', '150.05',
         '5.00', '0.05', '0', 'ORDER001', '示例交易'
-    ])
-
-    output.seek(0)
-    return output
-
-
-def get_symbol_import_template():
-    """获取标的导入模板"""
-    output = io.StringIO()
-    writer = csv.writer(output)
-
-    headers = [
+    ],
+)
+_SYMBOL_TEMPLATE_ROWS = (
+    [
         '标的代码', '标的名称', '类型', '交易所', '计价货币',
         '合约乘数', '最小变动', '保证金率', '手续费率', '每手手续费', '描述'
-    ]
-    writer.writerow(headers)
-
+    ],
     # 示例数据
-    writer.writerow([
+    [
         'AAPL', '苹果公司', '股票', 'NASDAQ', 'USD',
         '1', '0.01', '', '0.0001', '0', '苹果公司股票'
-    ])
-    writer.writerow([
+    ],
+    [
         'IF2401', '沪深300指数期货2401', '期货', '中金所', 'CNY',
         '300', '0.2', '0.12', '0.000023', '0', '股指期货'
-    ])
+    ],
+)
+_TRADE_TEMPLATE_TEXT = ''.join(_csv_line(row) for row in _TRADE_TEMPLATE_ROWS)
+_SYMBOL_TEMPLATE_TEXT = ''.join(_csv_line(row) for row in _SYMBOL_TEMPLATE_ROWS)
+# 下载用的字节内容（带 BOM，Excel 打开中文表头不乱码）
+_TEMPLATE_BYTES = {
+    'trade': _TRADE_TEMPLATE_TEXT.encode('utf-8-sig'),
+    'symbol': _SYMBOL_TEMPLATE_TEXT.encode('utf-8-sig'),
+}
 
-    output.seek(0)
-    return output
+
+def get_trade_import_template():
+    """获取交易导入模板"""
+    return io.StringIO(_TRADE_TEMPLATE_TEXT)
+
+
+def get_symbol_import_template():
+    """获取标的导入模板"""
+    return io.StringIO(_SYMBOL_TEMPLATE_TEXT)
+
+
+def get_import_template_bytes(template_type):
+    """获取导入模板的下载内容（UTF-8 带 BOM），未知类型按交易模板处理"""
+    return _TEMPLATE_BYTES.get(template_type, _TEMPLATE_BYTES['trade'])
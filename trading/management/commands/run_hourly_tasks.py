@@ -1,9 +1,9 @@
 """
 每小时自动化任务管理命令
 用法: python manage.py run_hourly_tasks
+定时任务中可加 --skip-checks 跳过系统检查，缩短启动时间
 """
 from django.core.management.base import BaseCommand
-from trading.automation import run_hourly_tasks
 import logging
 
 logger = logging.getLogger(__name__)
@@ -27,6 +27,9 @@ class Command(BaseCommand):
             self.stdout.write('  2. 检查风险规则')
             return
 
+        # 模拟运行用不到自动化模块，真正执行时再导入
+        from trading.automation import run_hourly_tasks
+
         self.stdout.write('开始运行每小时自动化任务...')
 
         try:
@@ -1,15 +1,33 @@
 """
 同步持仓管理命令
 用法: python manage.py sync_positions
+默认每个账户只输出汇总，加 -v 2 或 --dry-run 时逐个标的输出明细
 """
 from django.core.management.base import BaseCommand
 from django.db import transaction
 from django.db.models import Sum
 from decimal import Decimal
+from itertools import groupby
+from operator import itemgetter
 import logging
 
 logger = logging.getLogger(__name__)
 
+# 循环中反复用到的常量，避免每次重新构造 Decimal
+ZERO = Decimal('0')
+HUNDRED = Decimal('100')
+# 读取交易时每次从数据库取回的行数
+SYNC_CHUNK_SIZE = 2000
+# 允许做空（超卖转空、空头加仓）的标的类型
+SHORTABLE_SYMBOL_TYPES = ('futures', 'forex', 'crypto')
+# 批量写入持仓时每批的行数
+SYNC_BATCH_SIZE = 1000
+# 同步时重算并写回的持仓字段
+POSITION_SYNC_FIELDS = [
+    'quantity', 'avg_price', 'current_price', 'market_value',
+    'profit_loss', 'profit_loss_ratio', 'updated_at',
+]
+
 
 class Command(BaseCommand):
     help = '根据已成交交易重新计算并同步所有持仓'
@@ -37,123 +55,161 @@ class Command(BaseCommand):
         account_id = options.get('account')
         dry_run = options['dry_run']
         clear_first = options['clear']
+        # 逐个标的的明细只在模拟运行或 -v 2 以上时格式化输出
+        show_detail = dry_run or options['verbosity'] >= 2
 
         if dry_run:
             self.stdout.write(self.style.WARNING('模拟运行模式'))
 
-        # 获取账户
+        # 获取账户：只查询一次，存在性判断、计数和遍历都用同一个列表
         if account_id:
             accounts = Account.objects.filter(id=account_id)
-            if not accounts.exists():
-                self.stdout.write(self.style.ERROR(f'账户ID {account_id} 不存在'))
-                return
         else:
             accounts = Account.objects.filter(status='active')
+        # 循环里只用到账户的 ID 和名称
+        account_list = list(accounts.only('id', 'name'))
+
+        if account_id and not account_list:
+            self.stdout.write(self.style.ERROR(f'账户ID {account_id} 不存在'))
+            return
 
-        self.stdout.write(f'开始同步 {accounts.count()} 个账户的持仓...')
+        self.stdout.write(f'开始同步 {len(account_list)} 个账户的持仓...')
 
         total_positions = 0
         total_updated = 0
 
-        for account in accounts:
-            self.stdout.write(f'\n处理账户: {account.name}')
+        # 一次取出这些账户成交记录涉及的标的，读取交易时不再逐行 JOIN 标的表
+        symbol_map = {
+            symbol_id: (code, symbol_type, contract_size)
+            for symbol_id, code, symbol_type, contract_size in Symbol.objects.filter(
+                id__in=TradeLog.objects.filter(account__in=accounts, status='filled').values('symbol_id')
+            ).values_list('id', 'code', 'symbol_type', 'contract_size')
+        }
 
-            if clear_first and not dry_run:
-                Position.objects.filter(account=account).delete()
-                self.stdout.write('  - 已清除现有持仓')
+        # 需要先清除时，一条 DELETE 清掉所有待同步账户的持仓
+        if clear_first and not dry_run:
+            Position.objects.filter(account__in=accounts).delete()
 
-            # 获取该账户所有已成交的交易，按时间排序
+        for account in account_list:
+            self.stdout.write(f'\n处理账户: {account.name}')
+
+            # 获取该账户所有已成交的交易，按标的分组、组内按时间排序；只取计算持仓用到的列
             trades = TradeLog.objects.filter(
                 account=account,
                 status='filled'
-            ).select_related('symbol').order_by('trade_time')
-
-            if not trades.exists():
-                self.stdout.write('  - 无交易记录')
-                continue
+            ).order_by('symbol_id', 'trade_time', 'id').values_list(
+                'symbol_id', 'side', 'quantity', 'price', 'executed_price',
+            )
 
-            # 按标的分组计算持仓
-            symbol_positions = {}
+            # 按标的分组计算持仓：(标的ID, 代码, 类型, 合约乘数, 数量, 总成本, 最新价)
+            symbol_positions = []
+            has_trades = False
 
-            for trade in trades:
-                symbol = trade.symbol
-                if not symbol:
+            # 分块读取，内存占用与交易笔数无关；是否有交易在遍历时顺便判断，省去 exists() 查询
+            # 逐行取元组而不实例化模型，同一标的的交易相邻，用局部变量累计
+            for symbol_id, symbol_trades in groupby(
+                trades.iterator(chunk_size=SYNC_CHUNK_SIZE), key=itemgetter(0)
+            ):
+                has_trades = True
+                if symbol_id is None:
                     continue
 
-                if symbol.id not in symbol_positions:
-                    symbol_positions[symbol.id] = {
-                        'symbol': symbol,
-                        'quantity': Decimal('0'),
-                        'total_cost': Decimal('0'),
-                        'current_price': Decimal('0'),
-                    }
-
-                pos = symbol_positions[symbol.id]
-                price = trade.executed_price or trade.price
-                qty = trade.quantity
-
-                if trade.side == 'buy':
-                    # 买入
-                    if pos['quantity'] >= 0:
-                        # 多头加仓
-                        new_cost = pos['total_cost'] + price * qty
-                        pos['quantity'] += qty
-                        pos['total_cost'] = new_cost
-                    else:
-                        # 平空仓
-                        if qty <= abs(pos['quantity']):
-                            pos['quantity'] += qty
+                if symbol_id not in symbol_map:
+                    # 取标的之后才写入的交易
+                    symbol_map[symbol_id] = Symbol.objects.values_list(
+                        'code', 'symbol_type', 'contract_size'
+                    ).get(id=symbol_id)
+                code, symbol_type, contract_size = symbol_map[symbol_id]
+                can_short = symbol_type in SHORTABLE_SYMBOL_TYPES
+
+                quantity = ZERO
+                total_cost = ZERO
+                # total_cost 对应的多头数量；部分平多后两者不等，成本折算推迟到下次加仓或遍历结束
+                cost_quantity = ZERO
+                price = ZERO
+
+                for _, side, qty, order_price, executed_price in symbol_trades:
+                    price = executed_price or order_price
+
+                    if side == 'buy':
+                        # 买入
+                        if quantity >= 0:
+                            # 多头加仓
+                            if quantity > 0 and quantity != cost_quantity:
+                                total_cost = total_cost * quantity / cost_quantity
+                            total_cost += price * qty
+                            quantity += qty
+                            cost_quantity = quantity
                         else:
-                            remaining = qty - abs(pos['quantity'])
-                            pos['quantity'] = remaining
-                            pos['total_cost'] = price * remaining
-                else:  # sell
-                    # 卖出
-                    if pos['quantity'] > 0:
-                        # 平多仓
-                        if qty <= pos['quantity']:
-                            pos['quantity'] -= qty
-                            if pos['quantity'] > 0:
-                                # 按比例减少成本
-                                avg_cost = pos['total_cost'] / (pos['quantity'] + qty)
-                                pos['total_cost'] = avg_cost * pos['quantity']
+                            # 平空仓
+                            if qty <= abs(quantity):
+                                quantity += qty
                             else:
-                                pos['total_cost'] = Decimal('0')
-                        else:
-                            # 超卖转空（仅期货）
-                            if symbol.symbol_type in ['futures', 'forex', 'crypto']:
-                                remaining = qty - pos['quantity']
-                                pos['quantity'] = -remaining
-                                pos['total_cost'] = price * remaining
+                                remaining = qty - abs(quantity)
+                                quantity = remaining
+                                total_cost = price * remaining
+                                cost_quantity = remaining
+                    else:  # sell
+                        # 卖出
+                        if quantity > 0:
+                            # 平多仓
+                            if qty <= quantity:
+                                quantity -= qty
+                                # 仍有持仓时成本按比例减少，延后一次性折算（连续多次部分平仓只需一次除法）
+                                if quantity <= 0:
+                                    total_cost = ZERO
                             else:
-                                pos['quantity'] = Decimal('0')
-                                pos['total_cost'] = Decimal('0')
-                    else:
-                        # 空头加仓
-                        if symbol.symbol_type in ['futures', 'forex', 'crypto']:
-                            pos['total_cost'] += price * qty
-                            pos['quantity'] -= qty
+                                # 超卖转空（仅期货）
+                                if can_short:
+                                    remaining = qty - quantity
+                                    quantity = -remaining
+                                    total_cost = price * remaining
+                                else:
+                                    quantity = ZERO
+                                    total_cost = ZERO
+                        else:
+                            # 空头加仓
+                            if can_short:
+                                total_cost += price * qty
+                                quantity -= qty
+
+                if quantity > 0 and quantity != cost_quantity:
+                    total_cost = total_cost * quantity / cost_quantity
+
+                symbol_positions.append(
+                    (symbol_id, code, symbol_type, contract_size, quantity, total_cost, price)
+                )
 
-                pos['current_price'] = price
+            messages = []
+            if clear_first and not dry_run:
+                messages.append('  - 已清除现有持仓')
+            if not has_trades:
+                messages.append('  - 无交易记录')
+
+            # 一次查出该账户已有持仓的标的，用于区分输出中的创建和更新（先清除时全部重新创建）
+            existing_symbol_ids = set()
+            if symbol_positions and not dry_run and not clear_first:
+                existing_symbol_ids = set(
+                    Position.objects.filter(
+                        account=account, symbol_id__in=[item[0] for item in symbol_positions]
+                    ).values_list('symbol_id', flat=True)
+                )
+            to_write = []
+            zero_symbol_ids = []
+            created_count = 0
 
             # 更新或创建持仓记录
-            for symbol_id, pos_data in symbol_positions.items():
-                qty = pos_data['quantity']
-                symbol = pos_data['symbol']
+            for symbol_id, code, symbol_type, contract_size, qty, total_cost, current_price in symbol_positions:
 
                 if qty == 0:
                     # 持仓为0，删除记录
-                    if not dry_run:
-                        Position.objects.filter(
-                            account=account,
-                            symbol=symbol
-                        ).delete()
-                    self.stdout.write(f'  - {symbol.code}: 已平仓')
+                    zero_symbol_ids.append(symbol_id)
+                    if show_detail:
+                        messages.append(f'  - {code}: 已平仓')
                     continue
 
                 # 计算均价
-                avg_price = pos_data['total_cost'] / abs(qty) if qty != 0 else Decimal('0')
-                current_price = pos_data['current_price']
+                avg_price = total_cost / abs(qty) if qty != 0 else ZERO
 
                 # 计算市值和盈亏
                 market_value = abs(qty) * current_price
@@ -164,43 +220,69 @@ class Command(BaseCommand):
                     else:
                         price_diff = avg_price - current_price
 
-                    if symbol.symbol_type in ['futures', 'index']:
-                        profit_loss = price_diff * abs(qty) * symbol.contract_size
+                    if symbol_type in ['futures', 'index']:
+                        profit_loss = price_diff * abs(qty) * contract_size
                     else:
                         profit_loss = price_diff * abs(qty)
 
-                    profit_loss_ratio = (price_diff / avg_price) * 100
+                    profit_loss_ratio = (price_diff / avg_price) * HUNDRED
                 else:
-                    profit_loss = Decimal('0')
-                    profit_loss_ratio = Decimal('0')
+                    profit_loss = ZERO
+                    profit_loss_ratio = ZERO
 
                 total_positions += 1
 
                 if dry_run:
-                    self.stdout.write(
-                        f'  - {symbol.code}: 数量={qty}, 均价={avg_price:.4f}, '
+                    messages.append(
+                        f'  - {code}: 数量={qty}, 均价={avg_price:.4f}, '
                         f'现价={current_price:.4f}, 盈亏={profit_loss:.2f}'
                     )
-                else:
-                    position, created = Position.objects.update_or_create(
-                        account=account,
-                        symbol=symbol,
-                        defaults={
-                            'quantity': qty,
-                            'avg_price': avg_price,
-                            'current_price': current_price,
-                            'market_value': market_value,
-                            'profit_loss': profit_loss,
-                            'profit_loss_ratio': profit_loss_ratio,
-                        }
-                    )
-                    total_updated += 1
-                    action = '创建' if created else '更新'
-                    self.stdout.write(
-                        f'  - {symbol.code}: {action} 数量={qty}, 均价={avg_price:.4f}, '
+                    continue
+
+                to_write.append(Position(
+                    account=account,
+                    symbol_id=symbol_id,
+                    quantity=qty,
+                    avg_price=avg_price,
+                    current_price=current_price,
+                    market_value=market_value,
+                    profit_loss=profit_loss,
+                    profit_loss_ratio=profit_loss_ratio,
+                ))
+                created = symbol_id not in existing_symbol_ids
+                created_count += created
+                total_updated += 1
+                if show_detail:
+                    messages.append(
+                        f'  - {code}: {"创建" if created else "更新"} 数量={qty}, 均价={avg_price:.4f}, '
                         f'盈亏={profit_loss:.2f}'
                     )
 
+            if symbol_positions and not show_detail:
+                messages.append(
+                    f'  - 创建 {created_count} 个，更新 {len(to_write) - created_count} 个，'
+                    f'平仓 {len(zero_symbol_ids)} 个'
+                )
+
+            # 删除和写入在同一个事务中，每个账户只提交一次；
+            # 写入用 INSERT ... ON CONFLICT (account, symbol) DO UPDATE，已有持仓就地更新
+            if not dry_run and (zero_symbol_ids or to_write):
+                with transaction.atomic(using=Position.objects.db):
+                    if zero_symbol_ids and not clear_first:
+                        Position.objects.filter(account=account, symbol_id__in=zero_symbol_ids).delete()
+                    if to_write:
+                        Position.objects.bulk_create(
+                            to_write,
+                            batch_size=SYNC_BATCH_SIZE,
+                            update_conflicts=True,
+                            unique_fields=['account', 'symbol'],
+                            update_fields=POSITION_SYNC_FIELDS,
+                        )
+
+            # 每个账户的明细一次性输出
+            if messages:
+                self.stdout.write('\n'.join(messages))
+
         if dry_run:
             self.stdout.write(self.style.WARNING(f'\n模拟完成: 将处理 {total_positions} 个持仓'))
         else:
@@ -0,0 +1,26 @@
+# Generated by Django 5.2.18 on 2026-10-15 22:34
+
+import django.db.models.expressions
+import django.db.models.functions.comparison
+import django.db.models.functions.math
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('trading', '0017_add_trade_type_and_opening_trade'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='tradeplan',
+            name='risk_reward_ratio',
+            field=models.GeneratedField(db_persist=True, expression=django.db.models.functions.math.Round(django.db.models.expressions.CombinedExpression(django.db.models.functions.math.Abs(django.db.models.expressions.CombinedExpression(django.db.models.functions.comparison.NullIf(models.F('take_profit_1'), 0), '-', django.db.models.expressions.CombinedExpression(django.db.models.expressions.CombinedExpression(models.F('entry_price_min'), '+', models.F('entry_price_max')), '/', models.Value(2.0)))), '/', django.db.models.functions.comparison.NullIf(django.db.models.functions.math.Abs(django.db.models.expressions.CombinedExpression(django.db.models.expressions.CombinedExpression(django.db.models.expressions.CombinedExpression(models.F('entry_price_min'), '+', models.F('entry_price_max')), '/', models.Value(2.0)), '-', models.F('stop_loss'))), 0)), 2), output_field=models.DecimalField(decimal_places=2, max_digits=10, null=True), verbose_name='盈亏比'),
+        ),
+        migrations.AlterField(
+            model_name='position',
+            name='quantity',
+            field=models.DecimalField(decimal_places=4, help_text='正数为多头，负数为空头', max_digits=15, verbose_name='持仓数量'),
+        ),
+    ]
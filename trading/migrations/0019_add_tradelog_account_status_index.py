@@ -0,0 +1,17 @@
+# Generated by Django 5.2.18 on 2026-10-15 22:45
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('trading', '0018_add_tradeplan_risk_reward_ratio'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='tradelog',
+            index=models.Index(fields=['account', 'status', '-trade_time'], name='trading_tra_account_facc4f_idx'),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-15 22:49
+
+import django.db.models.functions.datetime
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('trading', '0019_add_tradelog_account_status_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='tradelog',
+            name='trade_month',
+            field=models.GeneratedField(db_persist=True, expression=django.db.models.functions.datetime.TruncDate(django.db.models.functions.datetime.TruncMonth('trade_time')), output_field=models.DateField(), verbose_name='交易月份'),
+        ),
+        migrations.AddIndex(
+            model_name='tradelog',
+            index=models.Index(fields=['account', 'trade_month'], name='trading_tra_account_608f13_idx'),
+        ),
+    ]
@@ -0,0 +1,88 @@
+# Generated by Django 5.2.18 on 2026-10-15 22:51
+
+import django.db.models.deletion
+from decimal import Decimal
+from django.db import migrations, models
+from django.db.models import Count, Sum, Max, Min, Q
+from django.db.models.functions import TruncDate
+
+
+def backfill_symbol_daily_stats(apps, schema_editor):
+    """按历史已成交交易生成标的日统计"""
+    TradeLog = apps.get_model('trading', 'TradeLog')
+    SymbolDailyStat = apps.get_model('trading', 'SymbolDailyStat')
+
+    groups = TradeLog.objects.filter(status='filled').values(
+        'account_id', 'symbol_id', trade_date=TruncDate('trade_time')
+    ).annotate(
+        trade_count=Count('id'),
+        win_count=Count('id', filter=Q(profit_loss__gt=0)),
+        loss_count=Count('id', filter=Q(profit_loss__lt=0)),
+        pnl_sum=Sum('profit_loss'),
+        commission_sum=Sum('commission'),
+        quantity_sum=Sum('quantity'),
+        max_profit=Max('profit_loss', filter=Q(profit_loss__gt=0)),
+        max_loss=Min('profit_loss', filter=Q(profit_loss__lt=0)),
+        first_trade_time=Min('trade_time'),
+        last_trade_time=Max('trade_time'),
+    ).order_by()
+
+    SymbolDailyStat.objects.bulk_create(
+        (
+            SymbolDailyStat(
+                account_id=group['account_id'],
+                symbol_id=group['symbol_id'],
+                trade_date=group['trade_date'],
+                trade_count=group['trade_count'],
+                win_count=group['win_count'],
+                loss_count=group['loss_count'],
+                profit_loss=group['pnl_sum'] or Decimal('0'),
+                commission=group['commission_sum'] or Decimal('0'),
+                quantity=group['quantity_sum'] or Decimal('0'),
+                max_profit=group['max_profit'],
+                max_loss=group['max_loss'],
+                first_trade_time=group['first_trade_time'],
+                last_trade_time=group['last_trade_time'],
+            )
+            for group in groups.iterator(chunk_size=2000)
+        ),
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('trading', '0020_add_tradelog_trade_month'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SymbolDailyStat',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('trade_date', models.DateField(verbose_name='交易日期')),
+                ('trade_count', models.IntegerField(default=0, verbose_name='成交笔数')),
+                ('win_count', models.IntegerField(default=0, verbose_name='盈利笔数')),
+                ('loss_count', models.IntegerField(default=0, verbose_name='亏损笔数')),
+                ('profit_loss', models.DecimalField(decimal_places=2, default=0, max_digits=15, verbose_name='盈亏合计')),
+                ('commission', models.DecimalField(decimal_places=2, default=0, max_digits=15, verbose_name='手续费合计')),
+                ('quantity', models.DecimalField(decimal_places=4, default=0, max_digits=20, verbose_name='成交数量合计')),
+                ('max_profit', models.DecimalField(blank=True, decimal_places=2, max_digits=15, null=True, verbose_name='单笔最大盈利')),
+                ('max_loss', models.DecimalField(blank=True, decimal_places=2, max_digits=15, null=True, verbose_name='单笔最大亏损')),
+                ('first_trade_time', models.DateTimeField(verbose_name='首笔成交时间')),
+                ('last_trade_time', models.DateTimeField(verbose_name='末笔成交时间')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='更新时间')),
+                ('account', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='symbol_daily_stats', to='trading.account', verbose_name='账户')),
+                ('symbol', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_stats', to='trading.symbol', verbose_name='交易标的')),
+            ],
+            options={
+                'verbose_name': '标的日统计',
+                'verbose_name_plural': '标的日统计',
+                'ordering': ['-trade_date'],
+                'indexes': [models.Index(fields=['account', '-trade_date'], name='trading_sym_account_88dd54_idx')],
+                'unique_together': {('account', 'symbol', 'trade_date')},
+            },
+        ),
+        migrations.RunPython(backfill_symbol_daily_stats, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.18 on 2026-10-15 23:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('trading', '0021_add_symboldailystat'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='tradelog',
+            index=models.Index(fields=['strategy', 'status', 'trade_time'], name='trading_tra_strateg_1e6a8c_idx'),
+        ),
+    ]
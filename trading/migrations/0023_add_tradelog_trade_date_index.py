@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-15 23:13
+
+import django.db.models.functions.datetime
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('trading', '0022_add_tradelog_strategy_status_index'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='tradelog',
+            index=models.Index(django.db.models.functions.datetime.TruncDate('trade_time'), models.F('account'), models.F('status'), name='tl_trade_date_idx'),
+        ),
+    ]
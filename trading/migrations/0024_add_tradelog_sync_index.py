@@ -0,0 +1,17 @@
+# Generated by Django 5.2.18 on 2026-10-15 23:34
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('trading', '0023_add_tradelog_trade_date_index'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='tradelog',
+            index=models.Index(fields=['account', 'status', 'symbol', 'trade_time'], name='tl_sync_idx'),
+        ),
+    ]
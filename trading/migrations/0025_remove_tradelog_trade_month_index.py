@@ -0,0 +1,17 @@
+# Generated by Django 5.2.18 on 2026-10-15 23:51
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('trading', '0024_add_tradelog_sync_index'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='tradelog',
+            name='trading_tra_account_608f13_idx',
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.18 on 2026-10-16 00:00
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('trading', '0025_remove_tradelog_trade_month_index'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='tradelog',
+            name='trade_month',
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.18 on 2026-10-16 00:01
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('trading', '0026_remove_tradelog_trade_month'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='tradelog',
+            name='tl_trade_date_idx',
+        ),
+    ]
@@ -1,4 +1,6 @@
 from django.db import models, transaction
+from django.db.models import F
+from django.db.models.functions import Abs, NullIf, Round
 from django.contrib.auth.models import User
 from django.utils import timezone
 from django.core.validators import MinValueValidator
@@ -324,6 +326,10 @@ class TradeLog(models.Model):
         indexes = [
             models.Index(fields=['-trade_time']),
             models.Index(fields=['account', '-trade_time']),
+            models.Index(fields=['account', 'status', '-trade_time']),
+            # sync_positions 按账户读取已成交交易、按标的和时间顺序遍历，走索引无需再排序
+            models.Index(fields=['account', 'status', 'symbol', 'trade_time'], name='tl_sync_idx'),
+            models.Index(fields=['strategy', 'status', 'trade_time']),
         ]
 
     def __str__(self):
@@ -358,6 +364,28 @@ class TradeLog(models.Model):
 
         return pnl - self.commission
 
+    # save() 比较新旧状态/统计归属所需的字段
+    _SNAPSHOT_FIELDS = ('status', 'account_id', 'symbol_id', 'trade_time')
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # 从数据库加载时记录原始值，save() 时无需再查一次旧记录
+        instance._take_snapshot()
+        return instance
+
+    def refresh_from_db(self, *args, **kwargs):
+        super().refresh_from_db(*args, **kwargs)
+        self._take_snapshot()
+
+    def _take_snapshot(self):
+        loaded = self.__dict__
+        if all(name in loaded for name in self._SNAPSHOT_FIELDS):
+            self._loaded_snapshot = tuple(loaded[name] for name in self._SNAPSHOT_FIELDS)
+        else:
+            # 有字段被延迟加载，save() 时回退到查库
+            self._loaded_snapshot = None
+
     def save(self, *args, **kwargs):
         # 自动计算持仓时间
         if self.open_time and self.close_time:
@@ -372,10 +400,18 @@ class TradeLog(models.Model):
         is_new = self.pk is None
         old_status = None
         if not is_new:
-            old_obj = TradeLog.objects.filter(pk=self.pk).first()
-            old_status = old_obj.status if old_obj else None
+            snapshot = getattr(self, '_loaded_snapshot', None)
+            if snapshot is None:
+                snapshot = TradeLog.objects.filter(pk=self.pk).values_list(*self._SNAPSHOT_FIELDS).first()
+            if snapshot:
+                old_status, old_account_id, old_symbol_id, old_trade_time = snapshot
+                # 记录修改前的统计归属，账户/标的/日期变更时由信号重算原来的标的日统计
+                self._old_daily_stat_key = (
+                    old_account_id, old_symbol_id, timezone.localtime(old_trade_time).date()
+                )
 
         super().save(*args, **kwargs)
+        self._take_snapshot()
 
         # 状态变为已成交时，更新账户余额和持仓
         if self.status == 'filled' and (is_new or old_status != 'filled'):
@@ -399,13 +435,13 @@ class TradeLog(models.Model):
 
         # 使用事务和行锁确保数据一致性
         with transaction.atomic():
-            # 锁定账户记录
-            account = Account.objects.select_for_update().get(pk=self.account_id)
-
-            # 更新账户余额（已实现盈亏）
+            # 更新账户余额（已实现盈亏）：增量在数据库内累加，UPDATE 本身即持有账户行锁
+            account_qs = Account.objects.filter(pk=self.account_id)
             if self.profit_loss != 0:
-                account.current_balance += self.profit_loss
-                account.save(update_fields=['current_balance'])
+                account_qs.update(current_balance=F('current_balance') + self.profit_loss)
+            else:
+                # 无余额变动时显式加账户行锁，保持同一账户的持仓更新串行执行（结果不使用）
+                account_qs.select_for_update().only('pk').get()
 
             # 获取或创建持仓（带锁）
             try:
@@ -602,6 +638,38 @@ class MonthlyReport(models.Model):
         return f"{self.account.name} - {self.year}/{self.month}: {self.profit_loss}"
 
 
+class SymbolDailyStat(models.Model):
+    """标的日统计：按账户/标的/交易日汇总的已成交交易，由交易信号自动维护，供分析模块聚合"""
+    account = models.ForeignKey(Account, on_delete=models.CASCADE, verbose_name='账户',
+                                related_name='symbol_daily_stats')
+    symbol = models.ForeignKey(Symbol, on_delete=models.CASCADE, verbose_name='交易标的',
+                               related_name='daily_stats')
+    trade_date = models.DateField('交易日期')
+    trade_count = models.IntegerField('成交笔数', default=0)
+    win_count = models.IntegerField('盈利笔数', default=0)
+    loss_count = models.IntegerField('亏损笔数', default=0)
+    profit_loss = models.DecimalField('盈亏合计', max_digits=15, decimal_places=2, default=0)
+    commission = models.DecimalField('手续费合计', max_digits=15, decimal_places=2, default=0)
+    quantity = models.DecimalField('成交数量合计', max_digits=20, decimal_places=4, default=0)
+    max_profit = models.DecimalField('单笔最大盈利', max_digits=15, decimal_places=2, null=True, blank=True)
+    max_loss = models.DecimalField('单笔最大亏损', max_digits=15, decimal_places=2, null=True, blank=True)
+    first_trade_time = models.DateTimeField('首笔成交时间')
+    last_trade_time = models.DateTimeField('末笔成交时间')
+    updated_at = models.DateTimeField('更新时间', auto_now=True)
+
+    class Meta:
+        verbose_name = '标的日统计'
+        verbose_name_plural = '标的日统计'
+        unique_together = [['account', 'symbol', 'trade_date']]
+        ordering = ['-trade_date']
+        indexes = [
+            models.Index(fields=['account', '-trade_date']),
+        ]
+
+    def __str__(self):
+        return f"{self.account.name} - {self.symbol.code} {self.trade_date}: {self.profit_loss}"
+
+
 class PerformanceMetrics(models.Model):
     """策略绩效指标模型"""
     strategy = models.OneToOneField(Strategy, on_delete=models.CASCADE, verbose_name='策略',
@@ -1109,6 +1177,20 @@ class TradePlan(models.Model):
     position_size_percent = models.DecimalField('仓位比例', max_digits=5, decimal_places=2, null=True, blank=True,
                                                 help_text='占账户资金的百分比')
 
+    # 盈亏比：(止盈1 - 入场中值) / (入场中值 - 止损)，由数据库计算并存储
+    # 注意：SQL ROUND 为四舍五入（远离零），与原先 Python round() 的银行家舍入不同，
+    # 恰好落在 x.xx5 的比值会比旧的显示值大 0.01
+    risk_reward_ratio = models.GeneratedField(
+        expression=Round(
+            Abs(NullIf(F('take_profit_1'), 0) - (F('entry_price_min') + F('entry_price_max')) / 2.0)
+            / NullIf(Abs((F('entry_price_min') + F('entry_price_max')) / 2.0 - F('stop_loss')), 0),
+            2,
+        ),
+        output_field=models.DecimalField(max_digits=10, decimal_places=2, null=True),
+        db_persist=True,
+        verbose_name='盈亏比',
+    )
+
     # 分析理由
     analysis = models.TextField('分析理由', blank=True, help_text='技术面/基本面分析')
     key_levels = models.CharField('关键价位', max_length=200, blank=True,
@@ -1139,18 +1221,6 @@ class TradePlan(models.Model):
     def __str__(self):
         return f"{self.plan_date} {self.symbol.code} {self.get_direction_display()}"
 
-    @property
-    def risk_reward_ratio(self):
-        """计算盈亏比"""
-        entry_mid = (self.entry_price_min + self.entry_price_max) / 2
-        risk = abs(entry_mid - self.stop_loss)
-        if risk == 0:
-            return None
-        if self.take_profit_1:
-            reward = abs(self.take_profit_1 - entry_mid)
-            return round(reward / risk, 2)
-        return None
-
     @property
     def is_valid(self):
         """检查计划是否仍然有效"""
@@ -1395,26 +1465,27 @@ class PriceAlert(models.Model):
             self.save(update_fields=['status'])
             return False
 
-        triggered = False
+        triggered = self.evaluate_condition(current_price)
 
+        # 更新最后价格
+        self.last_price = current_price
+        self.save(update_fields=['last_price'])
+
+        return triggered
+
+    def evaluate_condition(self, current_price):
+        """判断当前价格是否满足条件（不检查状态、不保存）"""
         if self.condition == 'above':
-            triggered = current_price >= self.target_price
+            return current_price >= self.target_price
         elif self.condition == 'below':
-            triggered = current_price <= self.target_price
+            return current_price <= self.target_price
         elif self.condition == 'cross_up':
             # 向上穿越：之前低于目标价，现在高于
-            if self.last_price and self.last_price < self.target_price <= current_price:
-                triggered = True
+            return bool(self.last_price and self.last_price < self.target_price <= current_price)
         elif self.condition == 'cross_down':
             # 向下穿越：之前高于目标价，现在低于
-            if self.last_price and self.last_price > self.target_price >= current_price:
-                triggered = True
-
-        # 更新最后价格
-        self.last_price = current_price
-        self.save(update_fields=['last_price'])
-
-        return triggered
+            return bool(self.last_price and self.last_price > self.target_price >= current_price)
+        return False
 
     def trigger(self):
         """触发提醒"""
@@ -1427,7 +1498,11 @@ class PriceAlert(models.Model):
         self.save(update_fields=['triggered_at', 'trigger_count', 'status'])
 
         # 创建通知
-        Notification.objects.create(
+        self.build_notification().save()
+
+    def build_notification(self):
+        """构造触发通知（不保存）"""
+        return Notification(
             owner=self.owner,
             notification_type='price_alert',
             priority='high',
@@ -4,6 +4,12 @@
 """
 from django.utils import timezone
 from datetime import timedelta
+import logging
+
+logger = logging.getLogger(__name__)
+
+# 批量写入通知时每批的条数
+NOTIFICATION_BATCH_SIZE = 500
 
 
 class NotificationService:
@@ -16,11 +22,13 @@ class NotificationService:
         self.Notification = Notification
         self.NotificationSetting = NotificationSetting
         self.PriceAlert = PriceAlert
+        self._settings = None
 
     def get_settings(self):
-        """获取用户通知设置"""
-        setting, created = self.NotificationSetting.objects.get_or_create(owner=self.user)
-        return setting
+        """获取用户通知设置（同一服务实例内只查询一次）"""
+        if self._settings is None:
+            self._settings, created = self.NotificationSetting.objects.get_or_create(owner=self.user)
+        return self._settings
 
     def can_send_notification(self, notification_type):
         """检查是否可以发送特定类型的通知"""
@@ -42,12 +50,12 @@ class NotificationService:
 
         return type_settings.get(notification_type, True)
 
-    def create_notification(self, notification_type, title, message, priority='normal', **kwargs):
-        """创建通知"""
+    def build_notification(self, notification_type, title, message, priority='normal', **kwargs):
+        """构造通知对象但不保存，便于批量写入；不允许发送时返回 None"""
         if not self.can_send_notification(notification_type):
             return None
 
-        notification = self.Notification.objects.create(
+        return self.Notification(
             owner=self.user,
             notification_type=notification_type,
             title=title,
@@ -60,6 +68,14 @@ class NotificationService:
             extra_data=kwargs.get('extra_data', {}),
         )
 
+    def create_notification(self, notification_type, title, message, priority='normal', **kwargs):
+        """创建通知"""
+        return self._save(self.build_notification(notification_type, title, message, priority, **kwargs))
+
+    @staticmethod
+    def _save(notification):
+        if notification is not None:
+            notification.save()
         return notification
 
     def get_unread_count(self):
@@ -121,7 +137,11 @@ class NotificationService:
 
     def notify_risk_warning(self, risk_alert):
         """发送风险警告通知"""
-        return self.create_notification(
+        return self._save(self.build_risk_warning(risk_alert))
+
+    def build_risk_warning(self, risk_alert):
+        """构造风险警告通知（不保存）"""
+        return self.build_notification(
             notification_type='risk_warning',
             title=f'风险警告: {risk_alert.title}',
             message=risk_alert.message,
@@ -157,7 +177,11 @@ class NotificationService:
 
     def notify_plan_reminder(self, trade_plan):
         """发送交易计划提醒"""
-        return self.create_notification(
+        return self._save(self.build_plan_reminder(trade_plan))
+
+    def build_plan_reminder(self, trade_plan):
+        """构造交易计划提醒（不保存）"""
+        return self.build_notification(
             notification_type='plan_reminder',
             title=f'交易计划提醒: {trade_plan.symbol.code}',
             message=f'{trade_plan.symbol.name} {trade_plan.get_direction_display()} 计划，入场区间: {trade_plan.entry_price_min}-{trade_plan.entry_price_max}',
@@ -217,6 +241,47 @@ class NotificationService:
             return False
 
 
+def send_risk_warnings(alert_ids):
+    """批量发送风险警告通知，返回创建的通知数"""
+    from .models import RiskAlert
+    alerts = RiskAlert.objects.filter(id__in=alert_ids).select_related('account__owner')
+    return _bulk_notify(alerts, lambda alert: alert.account.owner, NotificationService.build_risk_warning)
+
+
+def send_plan_reminders(plan_ids):
+    """批量发送交易计划提醒，返回创建的通知数"""
+    from .models import TradePlan
+    plans = TradePlan.objects.filter(id__in=plan_ids).select_related('symbol', 'account__owner')
+    return _bulk_notify(plans, lambda plan: plan.account.owner, NotificationService.build_plan_reminder)
+
+
+def _bulk_notify(queryset, get_owner, build):
+    """逐条构造通知并分批 bulk_create，同一用户复用一个通知服务"""
+    from .models import Notification
+
+    services = {}
+    batch = []
+    created = 0
+    for obj in queryset.iterator(chunk_size=NOTIFICATION_BATCH_SIZE):
+        try:
+            owner = get_owner(obj)
+            service = services.get(owner.pk)
+            if service is None:
+                service = services[owner.pk] = NotificationService(owner)
+            notification = build(service, obj)
+        except Exception as e:
+            logger.error(f"Failed to build notification: {e}")
+            continue
+        if notification is not None:
+            batch.append(notification)
+        if len(batch) >= NOTIFICATION_BATCH_SIZE:
+            created += len(Notification.objects.bulk_create(batch))
+            batch = []
+    if batch:
+        created += len(Notification.objects.bulk_create(batch))
+    return created
+
+
 def check_pending_plans():
     """检查待执行的交易计划并发送提醒"""
     from .models import TradePlan, NotificationSetting
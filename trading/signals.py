@@ -1,9 +1,12 @@
-from django.db.models.signals import post_save, pre_save
+from django.db.models.signals import post_save, pre_save, post_delete
 from django.dispatch import receiver
 from django.db import transaction
+from django.db.models import Count, Sum, Max, Min, Q
+from django.utils import timezone
 from decimal import Decimal
-from datetime import date
-from .models import TradeLog, AccountTransaction, DailyReport, RiskRule, RiskAlert, RiskSnapshot, Position
+from datetime import date, datetime, time, timedelta
+from .models import (Account, TradeLog, AccountTransaction, DailyReport, RiskRule, RiskAlert, RiskSnapshot,
+                     Position, SymbolDailyStat)
 import logging
 
 logger = logging.getLogger(__name__)
@@ -184,6 +187,49 @@ def process_trade_log(sender, instance, created, **kwargs):
         check_risk_rules(instance)
 
 
+@receiver(post_save, sender=TradeLog)
+@receiver(post_delete, sender=TradeLog)
+def sync_symbol_daily_stat(sender, instance, **kwargs):
+    """
+    交易保存/删除后重算所属的标的日统计
+    不限状态：成交后改为撤单等也需要把该笔从统计中移除
+    """
+    # loaddata 等原始保存跳过，统计表由夹具自身或后续重算提供
+    if kwargs.get('raw'):
+        return
+
+    keys = {(instance.account_id, instance.symbol_id, timezone.localtime(instance.trade_time).date())}
+    old_key = instance.__dict__.pop('_old_daily_stat_key', None)
+    if old_key:
+        keys.add(old_key)
+    for account_id, symbol_id, trade_date in keys:
+        recalculate_symbol_daily_stat(account_id, symbol_id, trade_date)
+
+
+@receiver(post_save, sender=TradeLog)
+@receiver(post_delete, sender=TradeLog)
+def invalidate_analytics_cache(sender, instance, **kwargs):
+    """
+    交易新增/修改/删除后使该用户的分析报告缓存失效
+    事务提交后再失效，避免并发请求在提交前用旧数据重建缓存
+    """
+    if kwargs.get('raw'):
+        return
+
+    account_id = instance.account_id
+
+    def invalidate():
+        from .analytics import invalidate_report_cache
+
+        # 提交后按主键只读所有者，不解引用外键加载整个账户；账户已被级联删除时跳过
+        owner_id = Account.objects.filter(pk=account_id).values_list('owner_id', flat=True).first()
+        if owner_id is not None:
+            invalidate_report_cache(owner_id)
+
+    # 缓存失效为尽力而为：交易已提交，回调异常不应让保存/删除返回错误
+    transaction.on_commit(invalidate, robust=True)
+
+
 def calculate_trade_amount(trade_log):
     """
     计算交易对账户余额的影响
@@ -283,6 +329,40 @@ def update_daily_report(trade_log):
     recalculate_daily_report(report)
 
 
+def recalculate_symbol_daily_stat(account_id, symbol_id, trade_date):
+    """按原始成交重新计算一条标的日统计，当日已无成交时删除"""
+    day_start = timezone.make_aware(datetime.combine(trade_date, time.min))
+    stats = TradeLog.objects.filter(
+        account_id=account_id,
+        symbol_id=symbol_id,
+        status='filled',
+        trade_time__gte=day_start,
+        trade_time__lt=day_start + timedelta(days=1),
+    ).aggregate(
+        trade_count=Count('id'),
+        win_count=Count('id', filter=Q(profit_loss__gt=0)),
+        loss_count=Count('id', filter=Q(profit_loss__lt=0)),
+        pnl_sum=Sum('profit_loss'),
+        commission_sum=Sum('commission'),
+        quantity_sum=Sum('quantity'),
+        max_profit=Max('profit_loss', filter=Q(profit_loss__gt=0)),
+        max_loss=Min('profit_loss', filter=Q(profit_loss__lt=0)),
+        first_trade_time=Min('trade_time'),
+        last_trade_time=Max('trade_time'),
+    )
+
+    if not stats['trade_count']:
+        SymbolDailyStat.objects.filter(account_id=account_id, symbol_id=symbol_id, trade_date=trade_date).delete()
+        return
+
+    stats['profit_loss'] = stats.pop('pnl_sum') or Decimal('0')
+    stats['commission'] = stats.pop('commission_sum') or Decimal('0')
+    stats['quantity'] = stats.pop('quantity_sum') or Decimal('0')
+    SymbolDailyStat.objects.update_or_create(
+        account_id=account_id, symbol_id=symbol_id, trade_date=trade_date, defaults=stats
+    )
+
+
 def get_starting_balance(account, report_date):
     """获取指定日期的期初余额"""
     # 查找前一天的报表
@@ -452,10 +532,8 @@ def get_current_drawdown_percent(account):
     """获取当前回撤百分比"""
     # 获取历史最高余额
     from .models import RiskSnapshot
-    snapshots = RiskSnapshot.objects.filter(account=account).order_by('-peak_balance')
-    if snapshots.exists():
-        peak = snapshots.first().peak_balance
-    else:
+    peak = RiskSnapshot.objects.filter(account=account).aggregate(peak=Max('peak_balance'))['peak']
+    if peak is None:
         peak = account.initial_balance
 
     peak = max(peak, account.initial_balance)
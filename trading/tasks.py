@@ -0,0 +1,28 @@
+"""
+交易模块 Celery 任务
+通知发送走独立的 notifications 队列，避免阻塞风险检查和报表生成
+"""
+from celery import shared_task
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task(ignore_result=True)
+def send_risk_notifications(alert_ids):
+    """异步发送风险警告通知"""
+    from .notifications import send_risk_warnings
+
+    count = send_risk_warnings(alert_ids)
+    logger.info(f"Sent {count} risk notifications")
+    return count
+
+
+@shared_task(ignore_result=True)
+def send_plan_reminders(plan_ids):
+    """异步发送交易计划提醒"""
+    from .notifications import send_plan_reminders as send
+
+    count = send(plan_ids)
+    logger.info(f"Sent {count} plan reminders")
+    return count
@@ -1,3 +1,175 @@
-from django.test import TestCase
+import csv
+import io
+import random
+from datetime import datetime, timedelta
+from itertools import count
+from decimal import Decimal
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.db.models import Count, Max, Min, Q, Sum
+from django.db.models.functions import TruncDate
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+
+from .analytics import TradeAnalytics
+from .import_export import _csv_line
+from .models import Account, Symbol, SymbolDailyStat, TradeLog
+
+
+STAT_FIELDS = (
+    'account_id', 'symbol_id', 'trade_date', 'trade_count', 'win_count', 'loss_count', 'profit_loss',
+    'commission', 'quantity', 'max_profit', 'max_loss', 'first_trade_time', 'last_trade_time',
+)
+
+
+class SymbolDailyStatTests(TestCase):
+    """标的日统计由交易信号维护，任何变更后都应与按交易日志实时聚合的结果一致"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('trader', password='pw')
+        cls.account = Account.objects.create(
+            name='测试账户', account_type='stock', owner=cls.user,
+            initial_balance=Decimal('100000'), current_balance=Decimal('100000'),
+        )
+        cls.symbol = Symbol.objects.create(code='600519', name='贵州茅台', symbol_type='stock')
+        cls.other_symbol = Symbol.objects.create(code='000001', name='平安银行', symbol_type='stock')
+        cls.day1 = timezone.make_aware(datetime(2026, 3, 2, 10, 0))
+        cls.day2 = cls.day1 + timedelta(days=1)
+        cls.order_ids = count(1)
+
+    def _create_trade(self, symbol=None, trade_time=None, **kwargs):
+        defaults = {
+            'account': self.account,
+            'symbol': symbol or self.symbol,
+            'side': 'buy',
+            'quantity': Decimal('100'),
+            'price': Decimal('10'),
+            'status': 'filled',
+            'trade_time': trade_time or self.day1,
+            'order_id': f'T{next(self.order_ids)}',
+        }
+        defaults.update(kwargs)
+        return TradeLog.objects.create(**defaults)
+
+    def assertStatsMatchTradeLog(self):
+        expected = TradeLog.objects.filter(status='filled').values(
+            'account_id', 'symbol_id', trade_date=TruncDate('trade_time'),
+        ).annotate(
+            trade_count=Count('id'),
+            win_count=Count('id', filter=Q(profit_loss__gt=0)),
+            loss_count=Count('id', filter=Q(profit_loss__lt=0)),
+            max_profit=Max('profit_loss', filter=Q(profit_loss__gt=0)),
+            max_loss=Min('profit_loss', filter=Q(profit_loss__lt=0)),
+            commission=Sum('commission'),
+            quantity=Sum('quantity'),
+            first_trade_time=Min('trade_time'),
+            last_trade_time=Max('trade_time'),
+        ).annotate(
+            # 与字段同名的合计放在最后，避免前面的聚合引用到它
+            profit_loss=Sum('profit_loss'),
+        ).values(*STAT_FIELDS).order_by()
+        actual = SymbolDailyStat.objects.values(*STAT_FIELDS)
+        key = lambda row: (row['account_id'], row['symbol_id'], row['trade_date'])
+        self.assertEqual(sorted(actual, key=key), sorted(expected, key=key))
+
+    def test_create(self):
+        self._create_trade(profit_loss=Decimal('50'))
+        self._create_trade(profit_loss=Decimal('-20'), trade_time=self.day1 + timedelta(hours=2))
+        self._create_trade(symbol=self.other_symbol, trade_time=self.day2)
+        self._create_trade(status='pending')
+
+        self.assertEqual(SymbolDailyStat.objects.count(), 2)
+        self.assertStatsMatchTradeLog()
+
+    def test_edit_symbol_and_date(self):
+        trade = self._create_trade(profit_loss=Decimal('30'))
+        self._create_trade()
+
+        # create() 返回的实例直接修改标的
+        trade.symbol = self.other_symbol
+        trade.save()
+        self.assertStatsMatchTradeLog()
+
+        # 从数据库重新加载的实例修改日期
+        trade = TradeLog.objects.get(pk=trade.pk)
+        trade.trade_time = self.day2
+        trade.save()
+        self.assertStatsMatchTradeLog()
+        self.assertFalse(SymbolDailyStat.objects.filter(symbol=self.other_symbol, trade_date=self.day1.date()).exists())
+
+    def test_filled_cancelled_delete(self):
+        trade = self._create_trade(profit_loss=Decimal('80'))
+        self._create_trade(profit_loss=Decimal('-10'))
+        self.assertStatsMatchTradeLog()
+
+        trade = TradeLog.objects.get(pk=trade.pk)
+        trade.status = 'cancelled'
+        trade.save()
+        self.assertStatsMatchTradeLog()
+
+        trade.delete()
+        self.assertStatsMatchTradeLog()
+
+        TradeLog.objects.get().delete()
+        self.assertStatsMatchTradeLog()
+        self.assertFalse(SymbolDailyStat.objects.exists())
+
+
+# 指向无人监听的端口，模拟 Redis 故障
+UNREACHABLE_CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': 'redis://127.0.0.1:1/0',
+    }
+}
+
+
+@override_settings(CACHES=UNREACHABLE_CACHES)
+class ReportCacheUnavailableTests(TestCase):
+    """缓存不可用时交易的增删改与分析报告都应照常完成，只记录警告"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('trader', password='pw')
+        cls.account = Account.objects.create(
+            name='测试账户', account_type='stock', owner=cls.user,
+            initial_balance=Decimal('100000'), current_balance=Decimal('100000'),
+        )
+        cls.symbol = Symbol.objects.create(code='600519', name='贵州茅台', symbol_type='stock')
+
+    def test_trade_changes_survive_cache_outage(self):
+        with self.assertLogs('trading.analytics', 'WARNING'):
+            with self.captureOnCommitCallbacks(execute=True):
+                trade = TradeLog.objects.create(
+                    account=self.account, symbol=self.symbol, side='buy', quantity=Decimal('100'),
+                    price=Decimal('10'), status='filled', order_id='T1',
+                )
+        with self.assertLogs('trading.analytics', 'WARNING'):
+            with self.captureOnCommitCallbacks(execute=True):
+                trade.delete()
+        self.assertFalse(TradeLog.objects.exists())
+
+    def test_full_report_without_cache(self):
+        with self.assertLogs('trading.analytics', 'WARNING'):
+            report = TradeAnalytics(self.user).get_full_report()
+        self.assertIsInstance(report, dict)
+
+
+class CsvLineTests(SimpleTestCase):
+    """手写的 CSV 行拼接需与 csv.writer（excel 方言）输出一致"""
+
+    def _writer_line(self, fields):
+        buffer = io.StringIO()
+        csv.writer(buffer).writerow(fields)
+        return buffer.getvalue()
+
+    def test_matches_csv_writer(self):
+        rng = random.Random(0)
+        alphabet = ['a', '1', ' ', ',', '"', '\n', '\r', '中', '']
+        for _ in range(5000):
+            fields = [
+                ''.join(rng.choice(alphabet) for _ in range(rng.randint(0, 4)))
+                for _ in range(rng.randint(2, 8))
+            ]
+            self.assertEqual(_csv_line(fields), self._writer_line(fields), fields)
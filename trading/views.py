@@ -1,5 +1,5 @@
 from django.shortcuts import render, redirect
-from django.http import JsonResponse, HttpResponse
+from django.http import JsonResponse, HttpResponse, StreamingHttpResponse
 from django.db.models import Sum, Count, Avg, Min, Max
 from django.db.models.functions import TruncMonth
 from django.utils import timezone
@@ -7,6 +7,7 @@ from django.views.decorators.http import require_http_methods
 from django.views.decorators.csrf import csrf_exempt
 from django.contrib.auth.decorators import login_required
 from datetime import timedelta, datetime
+import codecs
 import json
 import logging
 from .models import Account, TradeLog, DailyReport, Position, Strategy, Notification, PriceAlert, Symbol, TradeTag, UserPreference, RiskRule, RiskSnapshot
@@ -198,8 +199,9 @@ def import_export_page(request):
         from django.shortcuts import redirect
         return redirect('admin:login')
 
-    accounts = Account.objects.filter(owner=request.user)
-    strategies = Strategy.objects.filter(owner=request.user)
+    # 下拉框只用到 id 和名称
+    accounts = Account.objects.filter(owner=request.user).only('id', 'name')
+    strategies = Strategy.objects.filter(owner=request.user).only('id', 'name')
 
     # 统计信息
     trade_count = TradeLog.objects.filter(account__owner=request.user).count()
@@ -213,6 +215,19 @@ def import_export_page(request):
     })
 
 
+def _csv_streaming_response(lines, filename):
+    """以流式响应返回逐行生成的CSV（UTF-8 带 BOM，便于 Excel 打开）"""
+    def stream():
+        # BOM 只在开头写一次；逐块编码时不能使用 utf-8-sig，否则每块都会带 BOM
+        yield codecs.BOM_UTF8
+        for line in lines:
+            yield line.encode('utf-8')
+
+    response = StreamingHttpResponse(stream(), content_type='text/csv; charset=utf-8')
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
+
+
 @rate_limit(max_requests=10, window_seconds=60)
 def export_trades(request):
     """导出交易记录"""
@@ -248,12 +263,8 @@ def export_trades(request):
             pass
 
     exporter = DataExporter(request.user)
-    csv_content = exporter.export_trades_csv(account=account, start_date=start, end_date=end)
-
-    response = HttpResponse(csv_content.getvalue(), content_type='text/csv; charset=utf-8-sig')
     filename = f'trades_{timezone.now().strftime("%Y%m%d_%H%M%S")}.csv'
-    response['Content-Disposition'] = f'attachment; filename="{filename}"'
-    return response
+    return _csv_streaming_response(exporter.iter_trades_csv(account=account, start_date=start, end_date=end), filename)
 
 
 @rate_limit(max_requests=10, window_seconds=60)
@@ -265,12 +276,8 @@ def export_accounts(request):
     from .import_export import DataExporter
 
     exporter = DataExporter(request.user)
-    csv_content = exporter.export_accounts_csv()
-
-    response = HttpResponse(csv_content.getvalue(), content_type='text/csv; charset=utf-8-sig')
     filename = f'accounts_{timezone.now().strftime("%Y%m%d_%H%M%S")}.csv'
-    response['Content-Disposition'] = f'attachment; filename="{filename}"'
-    return response
+    return _csv_streaming_response(exporter.iter_accounts_csv(), filename)
 
 
 @rate_limit(max_requests=10, window_seconds=60)
@@ -290,12 +297,8 @@ def export_positions(request):
             pass
 
     exporter = DataExporter(request.user)
-    csv_content = exporter.export_positions_csv(account=account)
-
-    response = HttpResponse(csv_content.getvalue(), content_type='text/csv; charset=utf-8-sig')
     filename = f'positions_{timezone.now().strftime("%Y%m%d_%H%M%S")}.csv'
-    response['Content-Disposition'] = f'attachment; filename="{filename}"'
-    return response
+    return _csv_streaming_response(exporter.iter_positions_csv(account=account), filename)
 
 
 @rate_limit(max_requests=10, window_seconds=60)
@@ -307,12 +310,8 @@ def export_symbols(request):
     from .import_export import DataExporter
 
     exporter = DataExporter(request.user)
-    csv_content = exporter.export_symbols_csv()
-
-    response = HttpResponse(csv_content.getvalue(), content_type='text/csv; charset=utf-8-sig')
     filename = f'symbols_{timezone.now().strftime("%Y%m%d_%H%M%S")}.csv'
-    response['Content-Disposition'] = f'attachment; filename="{filename}"'
-    return response
+    return _csv_streaming_response(exporter.iter_symbols_csv(), filename)
 
 
 @rate_limit(max_requests=10, window_seconds=60)
@@ -362,16 +361,15 @@ def download_template(request):
     """下载导入模板"""
     template_type = request.GET.get('type', 'trade')
 
-    from .import_export import get_trade_import_template, get_symbol_import_template
+    from .import_export import get_import_template_bytes
 
     if template_type == 'symbol':
-        csv_content = get_symbol_import_template()
         filename = 'symbol_import_template.csv'
     else:
-        csv_content = get_trade_import_template()
+        template_type = 'trade'
         filename = 'trade_import_template.csv'
 
-    response = HttpResponse(csv_content.getvalue(), content_type='text/csv; charset=utf-8-sig')
+    response = HttpResponse(get_import_template_bytes(template_type), content_type='text/csv; charset=utf-8-sig')
     response['Content-Disposition'] = f'attachment; filename="{filename}"'
     return response
 